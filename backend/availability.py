@@ -0,0 +1,38 @@
+"""
+FormuLAW advocate availability
+
+Declared working hours are compiled into an IST hour-of-week bitmap
+(168 bits, 21 bytes) stored on the advocate as `availability_mask`. Bit b is
+set when the advocate works during hour b of the week, counted from Monday
+00:00 IST, so "is this advocate within their hours right now" is a single
+bit test in Mongo with $bitsAllSet / $bitsAllClear (bit 0 is
+the least significant bit of the first byte, matching MongoDB's BinData
+bit numbering).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+HOURS_PER_WEEK = 7 * 24
+
+# working_hours value -> daily [start_hour, end_hour) in IST
+WORKING_HOURS_WINDOWS = {
+    "anytime": (0, 24),
+    "24_7": (0, 24),
+    "9am_10pm": (9, 22),
+}
+
+def compile_working_hours(working_hours: str) -> bytes:
+    """Compile a working_hours value into a 168-bit hour-of-week bitmap"""
+    start, end = WORKING_HOURS_WINDOWS.get(working_hours, (0, 24))
+    mask = bytearray(HOURS_PER_WEEK // 8)
+    for day in range(7):
+        for hour in range(start, end):
+            bucket = day * 24 + hour
+            mask[bucket // 8] |= 1 << (bucket % 8)
+    return bytes(mask)
+
+def hour_of_week(moment: Optional[datetime] = None) -> int:
+    """IST hour-of-week bucket (0 = Monday 00:00-01:00 IST) for a moment, default now"""
+    moment = (moment or datetime.now(timezone.utc)).astimezone(IST)
+    return moment.weekday() * 24 + moment.hour
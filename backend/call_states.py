@@ -0,0 +1,59 @@
+"""
+FormuLAW call state machine
+
+Call lifecycle changes are recorded as append-only events in `call_events`;
+the call document's status is a projection of those events. Every state has
+a rank and a call only ever moves to a state of higher rank, so webhooks
+that arrive late, out of order or twice cannot roll a call back. All
+terminal states share the top rank - the first one to arrive wins, which is
+also what keeps billing to a single charge per call.
+"""
+
+CALL_STATE_RANK = {
+    "initiated": 0,
+    "initiating": 0,
+    "pending": 0,
+    "ringing": 1,
+    "connecting": 2,
+    "in-progress": 3,
+    "completed": 4,
+    "busy": 4,
+    "no-answer": 4,
+    "failed": 4,
+    "canceled": 4,
+}
+CALL_TERMINAL_RANK = 4
+
+def is_terminal(status: str) -> bool:
+    return CALL_STATE_RANK.get(status) == CALL_TERMINAL_RANK
+
+def transition_filter(call_id: str, status: str) -> dict:
+    """Filter matching the call only while it is in a lower-ranked state than `status`"""
+    return {
+        "id": call_id,
+        "$or": [
+            {"state_rank": {"$lt": CALL_STATE_RANK[status]}},
+            {"state_rank": {"$exists": False}}  # Calls created before the event log
+        ]
+    }
+
+def transition_fields(event: dict) -> dict:
+    """Fields an applied event sets on the call document"""
+    return {
+        **(event.get("fields") or {}),
+        "status": event["status"],
+        "state_rank": CALL_STATE_RANK[event["status"]],
+        "status_updated_at": event["created_at"],
+    }
+
+def project_call_events(events: list) -> dict:
+    """Fold a call's events (oldest first) into its lifecycle fields, using the same rule as live updates"""
+    projection = {}
+    rank = -1
+    for event in events:
+        event_rank = CALL_STATE_RANK.get(event["status"])
+        if event_rank is None or event_rank <= rank:
+            continue
+        rank = event_rank
+        projection.update(transition_fields(event))
+    return projection
@@ -0,0 +1,169 @@
+"""
+FormuLAW response compression
+
+ASGI middleware that gzip- or brotli-compresses JSON / text responses,
+negotiated from Accept-Encoding:
+
+- Bodies under `minimum_size` are sent as-is (not worth the CPU)
+- Bodies over `offload_size` are compressed in a worker thread so large
+  listings do not stall the event loop
+- Responses under `cache_prefixes` (static reference data) keep their
+  compressed bytes, keyed by a digest of the body; as repeat hits cost no
+  CPU they are compressed from the lower `cache_minimum_size`
+- Streaming responses (exports) and already-encoded responses pass through
+
+Brotli is used when the optional `Brotli` package is installed.
+"""
+import asyncio
+import gzip
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # Optional - gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "application/x-ndjson")
+
+# Process-wide counters, reported by /admin/metrics
+COMPRESSION_STATS = {
+    "compressed": 0,
+    "skipped_small": 0,
+    "offloaded": 0,
+    "cache_hits": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+}
+
+def negotiate_encoding(accept_encoding: str):
+    """Pick "br" or "gzip" from an Accept-Encoding header, or None"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            weights[name] = quality
+    wildcard = weights.get("*", 0.0)
+    br = weights.get("br", wildcard) if brotli is not None else 0.0
+    gz = weights.get("gzip", wildcard)
+    if br > 0 and br >= gz:
+        return "br"
+    if gz > 0:
+        return "gzip"
+    return None
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        offload_size: int = 64 * 1024,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+        cache_prefixes: tuple = (),
+        cache_minimum_size: int = 256,
+        cache_entries: int = 256
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_prefixes = tuple(cache_prefixes)
+        self.cache_minimum_size = cache_minimum_size
+        self.cache_entries = cache_entries
+        self.cache = {}  # (encoding, body digest) -> compressed body
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        cacheable = scope["path"].startswith(self.cache_prefixes) if self.cache_prefixes else False
+        responder = _CompressionResponder(self, send, encoding, cacheable)
+        await self.app(scope, receive, responder.send)
+
+    def _compress_sync(self, body: bytes, encoding: str):
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def compress(self, body: bytes, encoding: str, cacheable: bool):
+        key = None
+        if cacheable:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            cached = self.cache.get(key)
+            if cached is not None:
+                COMPRESSION_STATS["cache_hits"] += 1
+                return cached
+        if len(body) >= self.offload_size:
+            COMPRESSION_STATS["offloaded"] += 1
+            compressed = await asyncio.to_thread(self._compress_sync, body, encoding)
+        else:
+            compressed = self._compress_sync(body, encoding)
+        if key is not None:
+            if len(self.cache) >= self.cache_entries:
+                del self.cache[next(iter(self.cache))]
+            self.cache[key] = compressed
+        return compressed
+
+class _CompressionResponder:
+    """Holds back the response start until the first body chunk shows whether to compress"""
+
+    def __init__(self, middleware: CompressionMiddleware, send, encoding, cacheable: bool):
+        self.middleware = middleware
+        self.send_downstream = send
+        self.encoding = encoding
+        self.cacheable = cacheable
+        self.start_message = None
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.start_message is None:
+            await self.send_downstream(message)
+            return
+
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=list(start["headers"]))
+        body = message.get("body", b"")
+        content_type = headers.get("content-type", "")
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES) and "content-encoding" not in headers
+
+        # Streaming bodies (more_body) are passed through untouched
+        if not compressible or message.get("more_body", False):
+            await self.send_downstream(start)
+            await self.send_downstream(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        minimum_size = self.middleware.cache_minimum_size if self.cacheable else self.middleware.minimum_size
+        if self.encoding is None or len(body) < minimum_size:
+            if self.encoding is not None:
+                COMPRESSION_STATS["skipped_small"] += 1
+            await self.send_downstream({**start, "headers": headers.raw})
+            await self.send_downstream(message)
+            return
+
+        compressed = await self.middleware.compress(body, self.encoding, self.cacheable)
+        if len(compressed) >= len(body):
+            await self.send_downstream({**start, "headers": headers.raw})
+            await self.send_downstream(message)
+            return
+
+        COMPRESSION_STATS["compressed"] += 1
+        COMPRESSION_STATS["bytes_in"] += len(body)
+        COMPRESSION_STATS["bytes_out"] += len(compressed)
+        headers["Content-Encoding"] = self.encoding
+        headers["Content-Length"] = str(len(compressed))
+        await self.send_downstream({**start, "headers": headers.raw})
+        await self.send_downstream({"type": "http.response.body", "body": compressed})
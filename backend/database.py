@@ -0,0 +1,224 @@
+"""
+FormuLAW database configuration
+
+Builds the Mongo client from the environment and applies per-collection
+concerns:
+
+- MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE: connections per server
+  (the min is opened at startup by warm_pool)
+- MONGO_MAX_IDLE_TIME_MS: idle connections are closed after this
+- MONGO_WAIT_QUEUE_TIMEOUT_MS: how long a request may wait for a free
+  connection before failing
+- MONGO_COMPRESSORS: wire compression, in preference order; codecs whose
+  Python package is not installed are dropped
+- Hot, disposable writes (OTPs, rollups) use w:1; money (wallets) uses
+  w:majority with a timeout
+
+Settings are read when the client is built, after the caller has loaded
+.env. PoolTelemetry records how long requests wait to check out a
+connection, which is the signal for sizing the pool against the number of
+workers.
+"""
+import asyncio
+import bisect
+import importlib.util
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import WriteConcern, monitoring
+from pymongo.read_concern import ReadConcern
+
+logger = logging.getLogger(__name__)
+
+# Python package each wire compressor needs (zlib ships with Python)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+FAST_COLLECTIONS = ("otps", "msg91_otps", "call_rollups", "advocate_rollups", "earnings_cache")
+DURABLE_COLLECTIONS = ("wallets", "wallet_statements", "wallet_ledger")
+
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+def mongo_settings() -> dict:
+    """Client settings from the environment"""
+    return {
+        "max_pool_size": int(os.environ.get('MONGO_MAX_POOL_SIZE', 100)),
+        "min_pool_size": int(os.environ.get('MONGO_MIN_POOL_SIZE', 10)),
+        "max_idle_time_ms": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 5 * 60 * 1000)),
+        "wait_queue_timeout_ms": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+        "server_selection_timeout_ms": int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000)),
+        "compressors": os.environ.get('MONGO_COMPRESSORS', 'zstd,snappy,zlib'),
+        "majority_wtimeout_ms": int(os.environ.get('MONGO_MAJORITY_WTIMEOUT_MS', 5000)),
+    }
+
+def collection_options(settings: dict) -> dict:
+    """Collection name -> get_collection options, for collections that differ from the client default"""
+    fast = {"write_concern": WriteConcern(w=1)}
+    durable = {
+        "write_concern": WriteConcern(w="majority", wtimeout=settings["majority_wtimeout_ms"]),
+        "read_concern": ReadConcern("majority"),
+    }
+    return {
+        **{name: fast for name in FAST_COLLECTIONS},
+        **{name: durable for name in DURABLE_COLLECTIONS},
+    }
+
+def available_compressors(names: str) -> list:
+    """Requested wire compressors whose codec is importable, in the requested order"""
+    compressors = []
+    for name in (n.strip() for n in names.split(",")):
+        module = COMPRESSOR_MODULES.get(name)
+        if module and importlib.util.find_spec(module) is not None:
+            compressors.append(name)
+        elif name:
+            logger.info(f"Mongo wire compressor {name} unavailable, skipping")
+    return compressors
+
+class PoolTelemetry(monitoring.ConnectionPoolListener):
+    """
+    Connection pool counters and checkout wait times.
+
+    pymongo emits the checkout started / checked out pair on the thread
+    doing the checkout, so the wait is timed with a thread-local start.
+    """
+
+    def __init__(self, max_pool_size: int, recent: int = 1024):
+        self.max_pool_size = max_pool_size
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.waits_ms = deque(maxlen=recent)
+        self.histogram = [0] * (len(CHECKOUT_WAIT_BUCKETS_MS) + 1)
+        self.stats = {
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checked_out": 0,
+            "connections_open": 0,
+            "pool_clears": 0,
+            "max_wait_ms": 0.0,
+        }
+
+    def _wait_ms(self):
+        started = getattr(self.local, "started", None)
+        self.local.started = None
+        return (time.perf_counter() - started) * 1000 if started is not None else None
+
+    def connection_check_out_started(self, event):
+        self.local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait_ms = self._wait_ms()
+        with self.lock:
+            self.stats["checkouts"] += 1
+            self.stats["checked_out"] += 1
+            if wait_ms is not None:
+                self.waits_ms.append(wait_ms)
+                self.histogram[bisect.bisect_left(CHECKOUT_WAIT_BUCKETS_MS, wait_ms)] += 1
+                self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_ms)
+
+    def connection_check_out_failed(self, event):
+        self._wait_ms()
+        with self.lock:
+            self.stats["checkout_failures"] += 1
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.stats["checked_out"] -= 1
+
+    def connection_created(self, event):
+        with self.lock:
+            self.stats["connections_open"] += 1
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.stats["connections_open"] -= 1
+
+    def pool_cleared(self, event):
+        with self.lock:
+            self.stats["pool_clears"] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def saturation(self) -> float:
+        """Share of the pool currently checked out"""
+        return self.stats["checked_out"] / self.max_pool_size if self.max_pool_size else 0.0
+
+    def snapshot(self):
+        with self.lock:
+            waits = sorted(self.waits_ms)
+            stats = dict(self.stats)
+            histogram = list(self.histogram)
+
+        def percentile(p):
+            return round(waits[min(len(waits) - 1, int(len(waits) * p))], 3) if waits else 0.0
+
+        labels = [f"le_{bound}ms" for bound in CHECKOUT_WAIT_BUCKETS_MS] + ["gt_1000ms"]
+        return {
+            **stats,
+            "max_wait_ms": round(stats["max_wait_ms"], 3),
+            "max_pool_size": self.max_pool_size,
+            "saturation": round(self.saturation(), 4),
+            "wait_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+            "wait_histogram": dict(zip(labels, histogram)),
+        }
+
+def build_mongo_client(mongo_url: str, settings: dict, listeners=None):
+    """Motor client with the pool, timeout and compression settings"""
+    options = {
+        "maxPoolSize": settings["max_pool_size"],
+        "minPoolSize": settings["min_pool_size"],
+        "maxIdleTimeMS": settings["max_idle_time_ms"],
+        "waitQueueTimeoutMS": settings["wait_queue_timeout_ms"],
+        "serverSelectionTimeoutMS": settings["server_selection_timeout_ms"],
+    }
+    compressors = available_compressors(settings["compressors"])
+    if compressors:
+        options["compressors"] = compressors
+    if listeners:
+        options["event_listeners"] = listeners
+    return AsyncIOMotorClient(mongo_url, **options)
+
+class ConfiguredDatabase:
+    """
+    Database handle that returns collections with their per-collection
+    options (see collection_options) applied; everything else is delegated
+    to the Motor database.
+    """
+
+    def __init__(self, database, options: dict):
+        self._database = database
+        self._collection_options = options
+        self._collections = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._collections:
+            self._collections[name] = self._database.get_collection(name, **self._collection_options.get(name, {}))
+        return self._collections[name]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in self._collection_options:
+            return self[name]
+        return getattr(self._database, name)
+
+async def warm_pool(database, connections: int):
+    """Open `connections` pooled connections up front with concurrent pings"""
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*[database.command("ping") for _ in range(max(connections, 1))])
+        logger.info(f"Mongo pool warmed ({connections} connections) in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except Exception as e:
+        logger.error(f"Mongo pool warm-up failed: {str(e)}")
@@ -0,0 +1,93 @@
+"""
+FormuLAW city gazetteer
+
+Bundled coordinates for the cities offered by /api/utils/cities, used to
+geocode advocate locations offline (no external geocoding API at request
+time). Coordinates are city centres as (latitude, longitude).
+"""
+from typing import Optional
+
+CITY_COORDINATES = {
+    "Agra": (27.1767, 78.0081),
+    "Ahmedabad": (23.0225, 72.5714),
+    "Allahabad": (25.4358, 81.8463),
+    "Amritsar": (31.6340, 74.8723),
+    "Aurangabad": (19.8762, 75.3433),
+    "Bangalore": (12.9716, 77.5946),
+    "Bhopal": (23.2599, 77.4126),
+    "Chennai": (13.0827, 80.2707),
+    "Coimbatore": (11.0168, 76.9558),
+    "Delhi": (28.7041, 77.1025),
+    "Dhanbad": (23.7957, 86.4304),
+    "Faridabad": (28.4089, 77.3178),
+    "Ghaziabad": (28.6692, 77.4538),
+    "Gwalior": (26.2183, 78.1828),
+    "Howrah": (22.5958, 88.2636),
+    "Hyderabad": (17.3850, 78.4867),
+    "Indore": (22.7196, 75.8577),
+    "Jabalpur": (23.1815, 79.9864),
+    "Jaipur": (26.9124, 75.7873),
+    "Jodhpur": (26.2389, 73.0243),
+    "Kalyan-Dombivali": (19.2403, 73.1305),
+    "Kanpur": (26.4499, 80.3319),
+    "Kolkata": (22.5726, 88.3639),
+    "Kota": (25.2138, 75.8648),
+    "Lucknow": (26.8467, 80.9462),
+    "Ludhiana": (30.9010, 75.8573),
+    "Madurai": (9.9252, 78.1198),
+    "Meerut": (28.9845, 77.7064),
+    "Mumbai": (19.0760, 72.8777),
+    "Nagpur": (21.1458, 79.0882),
+    "Nashik": (19.9975, 73.7898),
+    "Navi Mumbai": (19.0330, 73.0297),
+    "Patna": (25.5941, 85.1376),
+    "Pimpri-Chinchwad": (18.6298, 73.7997),
+    "Pune": (18.5204, 73.8567),
+    "Raipur": (21.2514, 81.6296),
+    "Rajkot": (22.3039, 70.8022),
+    "Ranchi": (23.3441, 85.3096),
+    "Srinagar": (34.0837, 74.7973),
+    "Surat": (21.1702, 72.8311),
+    "Thane": (19.2183, 72.9781),
+    "Vadodara": (22.3072, 73.1812),
+    "Varanasi": (25.3176, 82.9739),
+    "Vasai-Virar": (19.3919, 72.8397),
+    "Vijayawada": (16.5062, 80.6480),
+    "Visakhapatnam": (17.6868, 83.2185),
+}
+
+# Common alternate spellings / former names -> gazetteer city
+CITY_ALIASES = {
+    "bengaluru": "Bangalore",
+    "bombay": "Mumbai",
+    "new delhi": "Delhi",
+    "calcutta": "Kolkata",
+    "madras": "Chennai",
+    "prayagraj": "Allahabad",
+    "vizag": "Visakhapatnam",
+    "baroda": "Vadodara",
+    "kalyan": "Kalyan-Dombivali",
+    "dombivli": "Kalyan-Dombivali",
+    "pimpri chinchwad": "Pimpri-Chinchwad",
+    "vasai": "Vasai-Virar",
+    "virar": "Vasai-Virar",
+    "chhatrapati sambhajinagar": "Aurangabad",
+}
+
+def _normalize(name: str) -> str:
+    return " ".join((name or "").lower().replace("-", " ").split())
+
+_LOOKUP = {_normalize(city): city for city in CITY_COORDINATES}
+_LOOKUP.update({_normalize(alias): city for alias, city in CITY_ALIASES.items()})
+
+def resolve_city(name: str) -> Optional[str]:
+    """Return the gazetteer spelling of a city name, or None if unknown"""
+    return _LOOKUP.get(_normalize(name))
+
+def geocode_city(name: str) -> Optional[dict]:
+    """Return a GeoJSON point for a city name, or None if it is not in the gazetteer"""
+    city = resolve_city(name)
+    if not city:
+        return None
+    lat, lng = CITY_COORDINATES[city]
+    return {"type": "Point", "coordinates": [lng, lat]}
@@ -0,0 +1,37 @@
+"""
+FormuLAW advocate roster import
+
+Bulk-registers advocates from a partner roster file, using the same
+validation, FID allocation and batched inserts as the admin import endpoint:
+
+    python import_advocates.py roster.csv
+    python import_advocates.py roster.ndjson --format ndjson
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from server import client, import_advocates, parse_advocate_roster
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import an advocate roster (CSV or NDJSON)")
+    parser.add_argument("path", type=Path, help="Roster file")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    args = parser.parse_args(argv)
+
+    roster_format = args.format or ("ndjson" if args.path.suffix in (".ndjson", ".jsonl") else "csv")
+    rows = parse_advocate_roster(args.path.read_text(encoding="utf-8-sig"), roster_format)
+
+    try:
+        result = asyncio.run(import_advocates(rows))
+    finally:
+        client.close()
+
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if result["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
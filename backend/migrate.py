@@ -0,0 +1,343 @@
+"""
+FormuLAW database migrations
+
+Index creation and seed data used to run in the app's startup hook, which made
+every cold start wait on a round trip per index. They live here instead and are
+run once per deploy (release phase / pre-deploy command). Only indexes and the
+default admin run by default; backfills rewrite live data and full-scan their
+collections, so they run only when named:
+
+    python migrate.py              # indexes + default admin
+    python migrate.py indexes      # indexes only
+    python migrate.py seed         # default admin only
+    python migrate.py geocode      # backfill advocate locations
+    python migrate.py rank         # backfill missing rating counters + ranking scores
+    python migrate.py availability # compile working hours into availability bitmaps
+    python migrate.py call_states  # backfill state ranks on calls made before the event log
+    python migrate.py rollups      # rebuild analytics rollups from calls
+    python migrate.py wallet_ledger # record settled call charges in the wallet ledger
+"""
+import argparse
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel, UpdateOne
+
+from gazetteer import geocode_city
+from ranking import RANK_INPUT_PROJECTION, compute_rank_fields
+from availability import WORKING_HOURS_WINDOWS, compile_working_hours
+from call_states import CALL_STATE_RANK
+from rollups import UNSPECIFIED, rollup_pipeline
+from database import build_mongo_client, mongo_settings
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger("formulaw.migrate")
+
+DEFAULT_ADMIN_EMAIL = "admin@formulaw.com"
+
+# Same setting as server.py; changing it needs collMod (or a dropped index) on msg91_otps
+MSG91_SESSION_TTL_SECONDS = int(os.environ.get('MSG91_SESSION_TTL_SECONDS', 15 * 60))
+
+# Indexes per collection. create_indexes() sends each collection's list in a
+# single command and is a no-op for indexes that already exist.
+INDEXES = {
+    "otps": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    "advocates": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("fid", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("fid_number", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("verification_status", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel([("location", GEOSPHERE), ("verification_status", ASCENDING), ("duty_status", ASCENDING)]),
+        # Listing filters + precomputed ranking sorts
+        IndexModel([("verification_status", ASCENDING), ("duty_status", ASCENDING), ("rank_score", DESCENDING)]),
+        IndexModel([("verification_status", ASCENDING), ("duty_status", ASCENDING), ("law_types", ASCENDING), ("rank_score", DESCENDING)]),
+        IndexModel([("verification_status", ASCENDING), ("duty_status", ASCENDING), ("city", ASCENDING), ("rank_score", DESCENDING)]),
+        IndexModel([("verification_status", ASCENDING), ("duty_status", ASCENDING), ("bayesian_rating", DESCENDING)]),
+        # Small index of on-duty advocates for the duty sweeps
+        IndexModel(
+            [("duty_status", ASCENDING), ("last_heartbeat_at", ASCENDING)],
+            name="duty_status_on",
+            partialFilterExpression={"duty_status": True}
+        ),
+        # get_current_user looks tokens up on every authenticated request
+        IndexModel([("token", ASCENDING)], sparse=True),
+    ],
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("token", ASCENDING)], sparse=True),
+        IndexModel([("created_at", DESCENDING)]),
+        # Admin user search: newest-first keyset paging, optionally per city
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("city", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("last_login", DESCENDING)]),
+    ],
+    "calls": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+        # Advocate earnings reports / dashboard totals
+        IndexModel([("advocate_id", ASCENDING), ("end_time", ASCENDING)]),
+    ],
+    "call_events": [
+        IndexModel([("call_id", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+    "webhook_inbox": [
+        IndexModel([("dedupe_key", ASCENDING)], unique=True),
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)]),
+        # Processed deliveries are kept for a week for provider redeliveries
+        IndexModel(
+            [("processed_at", ASCENDING)],
+            expireAfterSeconds=7 * 24 * 3600,
+            partialFilterExpression={"status": "done"}
+        ),
+    ],
+    "call_rollups": [
+        IndexModel([("day", ASCENDING), ("city", ASCENDING), ("law_type", ASCENDING)]),
+        IndexModel([("day", ASCENDING), ("law_type", ASCENDING)]),
+    ],
+    "advocate_rollups": [
+        IndexModel([("advocate_id", ASCENDING), ("day", ASCENDING)]),
+        IndexModel([("day", ASCENDING)]),
+    ],
+    "msg91_otps": [
+        # Older sessions may lack a request_id
+        IndexModel([("request_id", ASCENDING)], unique=True, partialFilterExpression={"request_id": {"$type": "string"}}),
+        IndexModel([("mobile", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=MSG91_SESSION_TTL_SECONDS),
+    ],
+    "wallets": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "wallet_statements": [
+        IndexModel([("user_id", ASCENDING), ("month", DESCENDING)]),
+    ],
+    "wallet_ledger": [
+        # _id is "<user_id>|<call_id>|<type>"; this serves lookups by call
+        IndexModel([("call_id", ASCENDING)]),
+    ],
+    "admins": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("token", ASCENDING)], sparse=True),
+    ],
+}
+
+# ========== MIGRATION STEPS ==========
+
+async def ensure_indexes(db):
+    """Create all indexes declared in INDEXES"""
+    for collection, models in INDEXES.items():
+        names = await db[collection].create_indexes(models)
+        logger.info(f"Indexes ensured on {collection}: {', '.join(names)}")
+
+async def seed_default_admin(db):
+    """Create the default admin account if it does not exist"""
+    admin_exists = await db.admins.find_one({"email": DEFAULT_ADMIN_EMAIL}, {"_id": 1})
+    if admin_exists:
+        return
+
+    admin = {
+        "id": str(uuid.uuid4()),
+        "email": DEFAULT_ADMIN_EMAIL,
+        "role": "admin",
+        "name": "Admin",
+        "token": None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "last_login": None
+    }
+    await db.admins.insert_one(admin)
+    logger.info(f"Default admin created: {DEFAULT_ADMIN_EMAIL}")
+
+async def geocode_advocates(db, batch_size=1000):
+    """Backfill GeoJSON locations for advocates registered before geocoding existed"""
+    operations = []
+    updated = unknown = 0
+    async for adv in db.advocates.find({"location": {"$exists": False}}, {"_id": 1, "city": 1}):
+        location = geocode_city(adv.get("city"))
+        if location is None:
+            unknown += 1  # Stored as null so the advocate is not rescanned
+        operations.append(UpdateOne({"_id": adv["_id"]}, {"$set": {"location": location}}))
+        if len(operations) >= batch_size:
+            await db.advocates.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await db.advocates.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    logger.info(f"Advocate locations backfilled: {updated} advocates, {unknown} with cities not in the gazetteer")
+
+async def rank_advocates(db, batch_size=1000):
+    """
+    Backfill missing rating / call counters and recompute every advocate's ranking score
+
+    Counters are only set where they do not exist yet: rate_call and call
+    outcomes $inc them live, so overwriting existing values would drop
+    updates landing between the aggregate and the write.
+    """
+    ratings = {
+        row["_id"]: row
+        async for row in db.calls.aggregate([
+            {"$match": {"rating": {"$ne": None}}},
+            {"$group": {"_id": "$advocate_id", "rating_sum": {"$sum": "$rating"}, "rating_count": {"$sum": 1}}}
+        ])
+    }
+    operations = []
+    updated = 0
+    async for adv in db.advocates.find({}, RANK_INPUT_PROJECTION):
+        stats = ratings.get(adv["id"], {})
+        if "rating_count" not in adv:
+            adv["rating_sum"] = stats.get("rating_sum", 0)
+            adv["rating_count"] = stats.get("rating_count", 0)
+            operations.append(UpdateOne(
+                {"id": adv["id"], "rating_count": {"$exists": False}},
+                {"$set": {"rating_sum": adv["rating_sum"], "rating_count": adv["rating_count"]}}
+            ))
+        for counter in ("call_attempts", "call_completions"):
+            if counter not in adv:
+                adv[counter] = 0
+                operations.append(UpdateOne({"id": adv["id"], counter: {"$exists": False}}, {"$set": {counter: 0}}))
+        operations.append(UpdateOne({"id": adv["id"]}, {"$set": compute_rank_fields(adv)}))
+        updated += 1
+        if len(operations) >= batch_size:
+            await db.advocates.bulk_write(operations, ordered=True)
+            operations = []
+    if operations:
+        await db.advocates.bulk_write(operations, ordered=True)
+    logger.info(f"Ranking scores recomputed for {updated} advocates")
+
+async def compile_availability(db):
+    """(Re)compile every advocate's availability bitmap from working_hours - one update_many per value"""
+    for working_hours in WORKING_HOURS_WINDOWS:
+        result = await db.advocates.update_many(
+            {"working_hours": working_hours},
+            {"$set": {"availability_mask": compile_working_hours(working_hours)}}
+        )
+        logger.info(f"Availability compiled for {result.modified_count} '{working_hours}' advocates")
+
+async def backfill_call_states(db):
+    """Set state_rank on calls created before the call event log, so late webhooks cannot roll them back"""
+    for status, rank in CALL_STATE_RANK.items():
+        result = await db.calls.update_many(
+            {"status": status, "state_rank": {"$exists": False}},
+            {"$set": {"state_rank": rank}}
+        )
+        if result.modified_count:
+            logger.info(f"State rank backfilled on {result.modified_count} '{status}' calls")
+
+async def rebuild_rollups(db, batch_size=1000):
+    """
+    Rebuild analytics rollups from finished calls.
+
+    Calls made before city / law type were snapshotted get them from their
+    advocate first. Buckets are replaced wholesale, so run it when few calls
+    are finishing - increments landing mid-rebuild can be overwritten.
+    """
+    advocates = {
+        adv["id"]: adv
+        async for adv in db.advocates.find({}, {"_id": 0, "id": 1, "city": 1, "law_types": 1})
+    }
+    operations = []
+    async for call in db.calls.find({"city": {"$exists": False}}, {"_id": 1, "advocate_id": 1}):
+        adv = advocates.get(call.get("advocate_id"), {})
+        law_types = adv.get("law_types") or []
+        operations.append(UpdateOne({"_id": call["_id"]}, {"$set": {
+            "city": adv.get("city") or UNSPECIFIED,
+            "law_type": law_types[0] if law_types else UNSPECIFIED
+        }}))
+        if len(operations) >= batch_size:
+            await db.calls.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.calls.bulk_write(operations, ordered=False)
+
+    finished = {"state_rank": {"$gte": CALL_STATE_RANK["completed"]}}
+    await db.calls.aggregate(rollup_pipeline(
+        {"city": {"$ifNull": ["$city", UNSPECIFIED]}, "law_type": {"$ifNull": ["$law_type", UNSPECIFIED]}},
+        "call_rollups", finished
+    )).to_list(None)
+    await db.calls.aggregate(rollup_pipeline({"advocate_id": "$advocate_id"}, "advocate_rollups", finished)).to_list(None)
+    await db.calls.update_many({**finished, "end_time": {"$type": "date"}}, {"$set": {"rolled_up": True}})
+    logger.info(f"Rollups rebuilt: {await db.call_rollups.count_documents({})} call buckets, "
+                f"{await db.advocate_rollups.count_documents({})} advocate buckets")
+
+async def backfill_wallet_ledger(db, batch_size=1000):
+    """Record call charges / earnings settled before the wallet ledger, from wallets and compacted statements"""
+    operations = []
+    recorded = 0
+    for collection in (db.wallets, db.wallet_statements):
+        async for doc in collection.find({"transactions.call_id": {"$exists": True}}, {"user_id": 1, "transactions": 1}):
+            for txn in doc.get("transactions", []):
+                if not txn.get("call_id"):
+                    continue
+                operations.append(UpdateOne(
+                    {"_id": f"{doc['user_id']}|{txn['call_id']}|{txn['type']}"},
+                    {"$setOnInsert": {
+                        "user_id": doc["user_id"],
+                        "call_id": txn["call_id"],
+                        "type": txn["type"],
+                        "amount": txn["amount"],
+                        "applied": True,
+                        "created_at": datetime.now(timezone.utc)
+                    }},
+                    upsert=True
+                ))
+                if len(operations) >= batch_size:
+                    await db.wallet_ledger.bulk_write(operations, ordered=False)
+                    recorded += len(operations)
+                    operations = []
+    if operations:
+        await db.wallet_ledger.bulk_write(operations, ordered=False)
+        recorded += len(operations)
+    logger.info(f"Wallet ledger backfilled from {recorded} call transactions")
+
+STEPS = {
+    "indexes": ensure_indexes,
+    "seed": seed_default_admin,
+    "geocode": geocode_advocates,
+    "rank": rank_advocates,
+    "availability": compile_availability,
+    "call_states": backfill_call_states,
+    "rollups": rebuild_rollups,
+    "wallet_ledger": backfill_wallet_ledger,
+}
+
+# Safe to run on every deploy; the rest are one-off backfills run by name
+DEFAULT_STEPS = ("indexes", "seed")
+
+async def run_migrations(db, steps=None):
+    """Run the given migration steps (DEFAULT_STEPS by default) in order"""
+    for name in steps or DEFAULT_STEPS:
+        logger.info(f"Running migration step: {name}")
+        await STEPS[name](db)
+
+# ========== CLI ==========
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run FormuLAW database migrations")
+    parser.add_argument("steps", nargs="*", choices=list(STEPS), help="Steps to run (default: indexes seed)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    client = build_mongo_client(os.environ['MONGO_URL'], mongo_settings())
+    try:
+        asyncio.run(run_migrations(client[os.environ['DB_NAME']], args.steps))
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+FormuLAW advocate ranking
+
+Composite discovery score stored on each advocate document (`rank_score`)
+and recomputed when its inputs change (a rating, a call outcome, a price
+change), never at query time. Inputs:
+
+- Bayesian-smoothed rating: few ratings are pulled towards a prior, so one
+  5-star review does not outrank hundreds of 4.8s
+- Experience from bar_council_issue_years / months, capped
+- Price per minute (cheaper ranks higher), capped
+- Recent completion rate from exponentially decayed call counters
+"""
+import os
+
+RANK_PRIOR_RATING = float(os.environ.get('RANK_PRIOR_RATING', 4.0))
+RANK_PRIOR_WEIGHT = float(os.environ.get('RANK_PRIOR_WEIGHT', 10))
+RANK_MAX_EXPERIENCE_YEARS = 30.0
+RANK_PRICE_CAP = float(os.environ.get('RANK_PRICE_CAP', 100))
+RANK_PRIOR_COMPLETION = 0.8
+RANK_COMPLETION_PRIOR_WEIGHT = 5.0
+# Each new call outcome multiplies older counters by this, so roughly the
+# last ~20 calls dominate the completion rate
+RANK_CALL_DECAY = 0.95
+
+RANK_WEIGHTS = {
+    "rating": 0.5,
+    "experience": 0.2,
+    "price": 0.1,
+    "completion": 0.2,
+}
+
+# Fields needed to compute the score
+RANK_INPUT_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "rating_sum": 1,
+    "rating_count": 1,
+    "bar_council_issue_years": 1,
+    "bar_council_issue_months": 1,
+    "per_minute_charge": 1,
+    "call_attempts": 1,
+    "call_completions": 1,
+}
+
+def bayesian_rating(rating_sum: float, rating_count: int) -> float:
+    return (RANK_PRIOR_WEIGHT * RANK_PRIOR_RATING + rating_sum) / (RANK_PRIOR_WEIGHT + rating_count)
+
+def compute_rank_fields(advocate: dict) -> dict:
+    """Return {"bayesian_rating", "rank_score"} for an advocate document"""
+    smoothed = bayesian_rating(advocate.get("rating_sum") or 0, advocate.get("rating_count") or 0)
+
+    years = (advocate.get("bar_council_issue_years") or 0) + (advocate.get("bar_council_issue_months") or 0) / 12
+    experience = min(max(years, 0), RANK_MAX_EXPERIENCE_YEARS) / RANK_MAX_EXPERIENCE_YEARS
+
+    price = min(max(advocate.get("per_minute_charge") or 0, 0), RANK_PRICE_CAP)
+    affordability = 1 - price / RANK_PRICE_CAP
+
+    completion = (
+        (advocate.get("call_completions") or 0) + RANK_PRIOR_COMPLETION * RANK_COMPLETION_PRIOR_WEIGHT
+    ) / ((advocate.get("call_attempts") or 0) + RANK_COMPLETION_PRIOR_WEIGHT)
+
+    score = (
+        RANK_WEIGHTS["rating"] * smoothed / 5
+        + RANK_WEIGHTS["experience"] * experience
+        + RANK_WEIGHTS["price"] * affordability
+        + RANK_WEIGHTS["completion"] * completion
+    )
+    return {"bayesian_rating": round(smoothed, 4), "rank_score": round(score * 100, 4)}
+
+def call_outcome_update(completed: bool) -> list:
+    """Aggregation-pipeline update that decays and bumps the call counters atomically"""
+    return [{"$set": {
+        "call_attempts": {"$add": [{"$multiply": [{"$ifNull": ["$call_attempts", 0]}, RANK_CALL_DECAY]}, 1]},
+        "call_completions": {"$add": [
+            {"$multiply": [{"$ifNull": ["$call_completions", 0]}, RANK_CALL_DECAY]},
+            1 if completed else 0
+        ]},
+    }}]
@@ -0,0 +1,141 @@
+"""
+FormuLAW provider resilience
+
+Outbound calls to SMS / telephony providers go through a per-provider
+CircuitBreaker so a degraded provider fails fast instead of holding
+requests for the full timeout:
+
+- closed: calls go through; `failure_threshold` consecutive failures open it
+- open: calls fail immediately with CircuitOpenError for `reset_seconds`
+- half-open: one trial call; success closes the breaker, failure re-opens it
+
+call_provider() adds jittered retries (only pass retries for idempotent
+operations, or restrict them to NOT_SENT_ERRORS). Breakers live for the
+process, so their state is shared by all requests it serves.
+"""
+import asyncio
+import random
+import time
+
+import httpx
+
+breakers = {}  # provider -> CircuitBreaker, reported by /admin/metrics
+
+PROVIDER_ERRORS = (httpx.TransportError, httpx.HTTPStatusError, asyncio.TimeoutError)
+# Raised before the request reached the provider, so a retry cannot repeat its effect
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class CircuitOpenError(Exception):
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} is temporarily unavailable")
+        self.provider = provider
+
+class CircuitBreaker:
+    def __init__(self, provider: str, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.provider = provider
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_inflight = False
+        self.stats = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "opened": 0,
+            "retries": 0,
+        }
+        self.latency_ms = 0.0  # Exponential moving average of successful calls
+        breakers[provider] = self
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self.trial_inflight:
+            self.trial_inflight = True
+            return True
+        self.stats["short_circuited"] += 1
+        return False
+
+    def record_success(self, elapsed_ms: float):
+        self.stats["successes"] += 1
+        self.latency_ms = elapsed_ms if not self.latency_ms else 0.8 * self.latency_ms + 0.2 * elapsed_ms
+        self.consecutive_failures = 0
+        self.trial_inflight = False
+        self.state = "closed"
+
+    def record_failure(self):
+        self.stats["failures"] += 1
+        self.consecutive_failures += 1
+        self.trial_inflight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.stats["opened"] += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ms": round(self.latency_ms, 1),
+        }
+
+def is_provider_failure(response: httpx.Response) -> bool:
+    """Responses that mean the provider itself is unhealthy (not a rejected request)"""
+    return response.status_code >= 500 or response.status_code == 429
+
+async def _attempt(breaker: CircuitBreaker, request):
+    """One request through the breaker; provider failures raise so they can be retried"""
+    if not breaker.allow():
+        raise CircuitOpenError(breaker.provider)
+    breaker.stats["calls"] += 1
+    started = time.perf_counter()
+    try:
+        response = await request()
+    except (httpx.TransportError, asyncio.TimeoutError):
+        breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.trial_inflight = False
+        raise
+    if is_provider_failure(response):
+        breaker.record_failure()
+        raise httpx.HTTPStatusError(
+            f"{breaker.provider} returned {response.status_code}", request=response.request, response=response
+        )
+    breaker.record_success((time.perf_counter() - started) * 1000)
+    return response
+
+async def call_provider(
+    breaker: CircuitBreaker,
+    request,
+    retries: int = 0,
+    retry_base_seconds: float = 0.2,
+    retry_on: tuple = PROVIDER_ERRORS
+):
+    """
+    Run `request` (a coroutine function returning an httpx.Response) through the breaker
+
+    - retries: extra attempts after `retry_on` errors (transport errors /
+      5xx by default), with full-jitter exponential backoff; only for
+      idempotent requests unless retry_on is NOT_SENT_ERRORS
+
+    Raises CircuitOpenError without calling the provider while the breaker
+    is open.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await _attempt(breaker, request)
+        except CircuitOpenError:
+            raise
+        except retry_on:
+            if attempt == retries:
+                raise
+            breaker.stats["retries"] += 1
+            await asyncio.sleep(random.uniform(0, retry_base_seconds * 2 ** attempt))
@@ -0,0 +1,102 @@
+"""
+FormuLAW analytics rollups
+
+Finished calls are counted into pre-bucketed documents so time-range
+analytics read a handful of small documents instead of scanning `calls`:
+
+- `call_rollups`: one document per IST day x city x law_type
+- `advocate_rollups`: one document per IST day x advocate
+
+Each bucket keeps day totals plus an `hours` subdocument keyed "00".."23"
+(IST hour the call ended). Live updates $inc the buckets when a call
+reaches a terminal state; rollup_pipeline() rebuilds them from `calls`.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo import UpdateOne
+
+from availability import IST
+
+IST_OFFSET = "+05:30"  # For $dateToString / $hour in the rebuild pipeline
+UNSPECIFIED = "Unspecified"
+METRICS = ("calls", "completed_calls", "billed_minutes", "revenue")
+
+def bucket_of(moment: datetime):
+    """(IST day "YYYY-MM-DD", IST hour "HH") for a moment; naive datetimes are UTC, as Mongo returns them"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    local = moment.astimezone(IST)
+    return local.strftime("%Y-%m-%d"), local.strftime("%H")
+
+def call_rollup_id(day: str, city: Optional[str], law_type: Optional[str]) -> str:
+    return f"{day}|{city or UNSPECIFIED}|{law_type or UNSPECIFIED}"
+
+def advocate_rollup_id(day: str, advocate_id: str) -> str:
+    return f"{day}|{advocate_id}"
+
+def rollup_operations(call: dict, status: str, billed_minutes: int, total_cost: float, ended_at: datetime):
+    """UpdateOne operations {collection: op} counting one finished call into its buckets"""
+    day, hour = bucket_of(ended_at)
+    completed = status == "completed"
+    values = {
+        "calls": 1,
+        "completed_calls": 1 if completed else 0,
+        "billed_minutes": billed_minutes if completed else 0,
+        "revenue": total_cost if completed else 0,
+    }
+    inc = {**values, **{f"hours.{hour}.{metric}": value for metric, value in values.items()}}
+    city = call.get("city") or UNSPECIFIED
+    law_type = call.get("law_type") or UNSPECIFIED
+    return {
+        "call_rollups": UpdateOne(
+            {"_id": call_rollup_id(day, city, law_type)},
+            {"$inc": inc, "$setOnInsert": {"day": day, "city": city, "law_type": law_type}},
+            upsert=True
+        ),
+        "advocate_rollups": UpdateOne(
+            {"_id": advocate_rollup_id(day, call["advocate_id"])},
+            {"$inc": inc, "$setOnInsert": {"day": day, "advocate_id": call["advocate_id"]}},
+            upsert=True
+        ),
+    }
+
+def rollup_pipeline(dimensions: dict, target: str, match: Optional[dict] = None) -> list:
+    """
+    Aggregation over `calls` that rebuilds one rollup collection with $merge.
+
+    `dimensions` maps bucket fields to expressions, e.g. {"advocate_id":
+    "$advocate_id"}; the bucket _id is the day followed by the dimension
+    values joined with "|", matching call_rollup_id / advocate_rollup_id.
+    """
+    completed = {"$eq": ["$status", "completed"]}
+    values = {
+        "calls": {"$sum": 1},
+        "completed_calls": {"$sum": {"$cond": [completed, 1, 0]}},
+        "billed_minutes": {"$sum": {"$cond": [completed, {"$ifNull": ["$billed_minutes", 0]}, 0]}},
+        "revenue": {"$sum": {"$cond": [completed, {"$ifNull": ["$total_cost", 0]}, 0]}},
+    }
+    keys = ["day", *dimensions]
+    return [
+        {"$match": {"end_time": {"$type": "date"}, **(match or {})}},
+        {"$group": {
+            "_id": {
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$end_time", "timezone": IST_OFFSET}},
+                "hour": {"$dateToString": {"format": "%H", "date": "$end_time", "timezone": IST_OFFSET}},
+                **dimensions
+            },
+            **values
+        }},
+        {"$group": {
+            "_id": {key: f"$_id.{key}" for key in keys},
+            **{metric: {"$sum": f"${metric}"} for metric in METRICS},
+            "hours": {"$push": {"k": "$_id.hour", "v": {metric: f"${metric}" for metric in METRICS}}}
+        }},
+        {"$project": {
+            "_id": {"$concat": [f"$_id.{keys[0]}", *[part for key in keys[1:] for part in ("|", f"$_id.{key}")]]},
+            **{key: f"$_id.{key}" for key in keys},
+            **{metric: 1 for metric in METRICS},
+            "hours": {"$arrayToObject": "$hours"}
+        }},
+        {"$merge": {"into": target, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
@@ -1,34 +1,55 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, BackgroundTasks, Request, Response
-from fastapi.responses import JSONResponse, PlainTextResponse
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, BackgroundTasks, Request, Response, Query
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
 import logging
 import asyncio
 import httpx
 import base64
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import List, Optional, Literal
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, ValidationError, TypeAdapter, create_model
+from typing import List, Optional, Literal, Union
 import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 import random
 import string
 import secrets
-from passlib.context import CryptContext
-import resend
+import sys
+import csv
+import io
+import json
+import re
+import bisect
+import heapq
+import itertools
+import hashlib
+import functools
+from gazetteer import CITY_COORDINATES, geocode_city
+from ranking import RANK_INPUT_PROJECTION, compute_rank_fields, call_outcome_update
+from availability import IST, compile_working_hours, hour_of_week
+from call_states import CALL_STATE_RANK, is_terminal, project_call_events, transition_fields, transition_filter
+from rollups import METRICS as ROLLUP_METRICS, UNSPECIFIED, rollup_operations
+from compression import COMPRESSION_STATS, CompressionMiddleware
+from resilience import NOT_SENT_ERRORS, CircuitBreaker, breakers as provider_breakers, call_provider
+from database import ConfiguredDatabase, PoolTelemetry, build_mongo_client, collection_options, mongo_settings as load_mongo_settings, warm_pool
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection (pool, compression and per-collection concerns: see database.py)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+mongo_settings = load_mongo_settings()
+mongo_pool = PoolTelemetry(mongo_settings["max_pool_size"])
+client = build_mongo_client(mongo_url, mongo_settings, listeners=[mongo_pool])
+db = ConfiguredDatabase(client[os.environ['DB_NAME']], collection_options(mongo_settings))
 
 # Resend configuration
-resend.api_key = os.environ.get('RESEND_API_KEY')
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'onboarding@resend.dev')
 
 # MSG91 Configuration
@@ -37,6 +58,150 @@ MSG91_AUTH_KEY = os.environ.get('MSG91_AUTH_KEY')
 MSG91_TOKEN_AUTH = os.environ.get('MSG91_TOKEN_AUTH')
 MSG91_OTP_URL = "https://control.msg91.com/api/v5/otp"
 
+# Login OTP delivery
+OTP_EXPIRY_SECONDS = 60
+OTP_VOICE_ESCALATION_SECONDS = float(os.environ.get('OTP_VOICE_ESCALATION_SECONDS', 20))
+
+# Outbound provider calls (MSG91 / Exotel): timeouts, circuit breakers, retries
+PROVIDER_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('PROVIDER_CONNECT_TIMEOUT_SECONDS', 2))
+PROVIDER_MAX_CONNECTIONS = int(os.environ.get('PROVIDER_MAX_CONNECTIONS', 100))
+PROVIDER_BREAKER_THRESHOLD = int(os.environ.get('PROVIDER_BREAKER_THRESHOLD', 5))  # Consecutive failures
+PROVIDER_BREAKER_RESET_SECONDS = float(os.environ.get('PROVIDER_BREAKER_RESET_SECONDS', 30))
+MSG91_TIMEOUT_SECONDS = float(os.environ.get('MSG91_TIMEOUT_SECONDS', 5))
+MSG91_VERIFY_RETRIES = int(os.environ.get('MSG91_VERIFY_RETRIES', 2))
+EXOTEL_TIMEOUT_SECONDS = float(os.environ.get('EXOTEL_TIMEOUT_SECONDS', 8))
+
+# MSG91 OTP sessions (the msg91_otps TTL index is created by migrate.py from the same setting)
+MSG91_SESSION_TTL_SECONDS = int(os.environ.get('MSG91_SESSION_TTL_SECONDS', 15 * 60))
+MSG91_MAX_VERIFY_ATTEMPTS = int(os.environ.get('MSG91_MAX_VERIFY_ATTEMPTS', 5))
+
+# Bulk admin operations
+BULK_VERIFY_MAX_ITEMS = 1000
+RESEND_BATCH_SIZE = 100  # Resend batch API limit
+
+# Streaming exports
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+EXPORT_ROWS_PER_CHUNK = 500
+
+# Bulk advocate import
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ROWS = int(os.environ.get('IMPORT_MAX_ROWS', 50000))
+FID_COUNTER_ID = "advocate_fid"
+
+# Terminal call statuses that count towards an advocate's completion rate
+# (canceled is the client hanging up first, failed is usually a provider error)
+RANK_CALL_OUTCOME_STATUSES = ("completed", "busy", "no-answer")
+
+# Cluster-wide background sweeps (set BACKGROUND_JOBS_ENABLED=0 to run them on
+# other replicas only; per-process flushers always run)
+BACKGROUND_JOBS_ENABLED = os.environ.get('BACKGROUND_JOBS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+AVAILABILITY_SWEEP_SECONDS = float(os.environ.get('AVAILABILITY_SWEEP_SECONDS', 300))
+
+# Presence heartbeats: clients beat every PRESENCE_HEARTBEAT_SECONDS; advocates
+# silent for PRESENCE_TTL_SECONDS are taken off duty
+PRESENCE_HEARTBEAT_SECONDS = 30
+PRESENCE_TTL_SECONDS = float(os.environ.get('PRESENCE_TTL_SECONDS', 120))
+PRESENCE_FLUSH_SECONDS = float(os.environ.get('PRESENCE_FLUSH_SECONDS', 15))
+PRESENCE_REAPER_SECONDS = float(os.environ.get('PRESENCE_REAPER_SECONDS', 30))
+PRESENCE_FLUSH_BATCH_SIZE = 1000
+
+# Call locks: an advocate is claimed when a call starts and released by the
+# terminal status webhook; the TTL frees advocates whose webhook never arrives
+BUSY_LOCK_TTL_SECONDS = float(os.environ.get('BUSY_LOCK_TTL_SECONDS', 1800))
+
+# Call event log (see call_states.py)
+CALL_EVENT_FLUSH_SECONDS = float(os.environ.get('CALL_EVENT_FLUSH_SECONDS', 1))
+CALL_EVENT_BATCH_SIZE = 500
+CALL_EVENT_WRITE_TIMEOUT_SECONDS = float(os.environ.get('CALL_EVENT_WRITE_TIMEOUT_SECONDS', 5))
+
+# Webhook inbox: receivers persist the payload and ack; a bounded pool of
+# workers per process applies it, retrying with exponential backoff
+WEBHOOK_WORKERS = int(os.environ.get('WEBHOOK_WORKERS', 4))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', 8))
+WEBHOOK_RETRY_BASE_SECONDS = 5
+WEBHOOK_RETRY_MAX_SECONDS = 1800
+WEBHOOK_LEASE_SECONDS = 120  # A claimed item is retried if its worker dies mid-way
+WEBHOOK_POLL_SECONDS = float(os.environ.get('WEBHOOK_POLL_SECONDS', 5))
+
+# Analytics time series (read from the rollup collections, see rollups.py)
+ANALYTICS_MAX_DAYS = 366
+ANALYTICS_MAX_HOURLY_DAYS = 31
+
+# Advocate earnings reports; closed periods are cached in earnings_cache
+EARNINGS_MAX_PERIODS = 366
+EARNINGS_METRICS = ("calls", "billed_minutes", "gross", "earnings", "platform_fee")
+
+# Wallet statements: transactions from closed IST months are moved out of the
+# wallet into one wallet_statements document per wallet and month
+WALLET_STATEMENT_SWEEP_SECONDS = float(os.environ.get('WALLET_STATEMENT_SWEEP_SECONDS', 6 * 3600))
+WALLET_STATEMENT_BATCH_SIZE = 500
+MAX_STATEMENTS_PAGE = 24
+
+# Admin user search (keyset paging)
+MAX_USER_SEARCH_PAGE = 200
+
+# Health (/healthz) and readiness (/readyz) probes; results are cached so probes add no load
+PROBE_CACHE_SECONDS = 1
+LOOP_LAG_INTERVAL_SECONDS = 0.5
+LIVENESS_MAX_LOOP_LAG_MS = float(os.environ.get('LIVENESS_MAX_LOOP_LAG_MS', 5000))
+READY_MAX_LOOP_LAG_MS = float(os.environ.get('READY_MAX_LOOP_LAG_MS', 250))
+READY_MONGO_TIMEOUT_SECONDS = float(os.environ.get('READY_MONGO_TIMEOUT_SECONDS', 1))
+READY_MAX_POOL_SATURATION = float(os.environ.get('READY_MAX_POOL_SATURATION', 0.9))
+READY_FAIL_ON_OPEN_BREAKER = os.environ.get('READY_FAIL_ON_OPEN_BREAKER', '').lower() in ('1', 'true', 'yes')
+
+# Graceful shutdown: background work gets this long to finish once uvicorn has drained requests
+SHUTDOWN_DRAIN_SECONDS = float(os.environ.get('SHUTDOWN_DRAIN_SECONDS', 20))
+
+# Read coalescing: identical concurrent reads share one query and one
+# serialized body, which is then reused for READ_COALESCE_TTL_SECONDS
+READ_COALESCE_TTL_SECONDS = float(os.environ.get('READ_COALESCE_TTL_SECONDS', 1))
+REFERENCE_DATA_TTL_SECONDS = 3600
+READ_COALESCE_MAX_ENTRIES = 1024
+
+# Response compression (gzip, or brotli when the Brotli package is installed)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_OFFLOAD_SIZE = int(os.environ.get('COMPRESSION_OFFLOAD_SIZE', 64 * 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 5))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+# Geo-proximity search
+DEFAULT_NEAR_RADIUS_KM = 25.0
+MAX_NEAR_RADIUS_KM = 500.0
+
+# Advocate listing sorts (rank_score / bayesian_rating are precomputed, see ranking.py)
+ADVOCATE_SORT_OPTIONS = {
+    "recommended": [("rank_score", -1)],
+    "newest": [("created_at", -1)],
+    "rating": [("bayesian_rating", -1), ("average_rating", -1)],
+    "price_low": [("per_minute_charge", 1)],
+    "price_high": [("per_minute_charge", -1)]
+}
+
+# Exported fields per dataset (tokens and Mongo ids never leave the database)
+EXPORT_DATASETS = {
+    "calls": {
+        "status_field": "status",
+        "fields": [
+            "id", "client_id", "advocate_id", "status", "created_at", "start_time", "end_time",
+            "duration_seconds", "duration_minutes", "billed_minutes", "cost_per_minute", "total_cost",
+            "rating", "exotel_call_sid", "exotel_status"
+        ]
+    },
+    "users": {
+        "status_field": None,
+        "fields": ["id", "email", "role", "name", "city", "created_at", "last_login"]
+    },
+    "advocates": {
+        "status_field": "verification_status",
+        "fields": [
+            "id", "fid", "email", "first_name", "last_name", "phone_number", "bar_council_id",
+            "bar_council_issue_years", "bar_council_issue_months", "languages", "law_types",
+            "working_hours", "area", "city", "state", "per_minute_charge", "verification_status",
+            "duty_status", "average_rating", "total_cases", "created_at"
+        ]
+    }
+}
+
 # Exotel Configuration
 EXOTEL_API_KEY = os.environ.get('EXOTEL_API_KEY')
 EXOTEL_API_TOKEN = os.environ.get('EXOTEL_API_TOKEN')
@@ -45,9 +210,10 @@ EXOTEL_SUBDOMAIN = os.environ.get('EXOTEL_SUBDOMAIN', 'api.exotel.com')
 EXOTEL_EXOPHONE = os.environ.get('EXOTEL_EXOPHONE', '04041893878')
 EXOTEL_APP_ID = os.environ.get('EXOTEL_APP_ID', '1191053')
 PER_MINUTE_RATE = float(os.environ.get('PER_MINUTE_RATE', 10))
+ADVOCATE_REVENUE_SHARE = float(os.environ.get('ADVOCATE_REVENUE_SHARE', 0.8))  # Rest is the platform fee
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Integration SDKs that must stay out of the import path; listed in the startup report if loaded
+HEAVY_MODULES = ["resend", "passlib", "bcrypt", "boto3", "google.genai", "google.generativeai", "litellm", "openai", "stripe", "pandas", "numpy"]
 
 # Create the main app
 app = FastAPI()
@@ -92,6 +258,7 @@ class UserResponse(BaseModel):
     name: Optional[str] = None
     city: Optional[str] = None
     created_at: datetime
+    last_login: Optional[datetime] = None
 
 # Advocate Models
 class AdvocateRegister(BaseModel):
@@ -116,7 +283,7 @@ class AdvocateUpdate(BaseModel):
     phone_number: Optional[str] = None
     languages: Optional[List[str]] = None
     law_types: Optional[List[str]] = None
-    working_hours: Optional[str] = None
+    working_hours: Optional[Literal["anytime", "9am_10pm", "24_7"]] = None
     area: Optional[str] = None
     city: Optional[str] = None
     state: Optional[str] = None
@@ -141,9 +308,40 @@ class AdvocateResponse(BaseModel):
     per_minute_charge: float
     verification_status: str
     duty_status: bool
+    is_busy: bool = False
     average_rating: float
     total_cases: int
     created_at: datetime
+    distance_km: Optional[float] = None
+
+class AdvocateCard(BaseModel):
+    """Compact advocate listing (`view=card`)"""
+    id: str
+    fid: str
+    first_name: str
+    last_name: str
+    city: str
+    state: str
+    languages: List[str]
+    law_types: List[str]
+    per_minute_charge: float
+    average_rating: float
+    total_cases: int
+    is_busy: bool = False
+    distance_km: Optional[float] = None
+
+class AdvocateSearchHit(BaseModel):
+    id: str
+    fid: str
+    first_name: str
+    last_name: str
+    area: str
+    city: str
+    law_types: List[str]
+    per_minute_charge: float
+    average_rating: float
+    duty_status: bool
+    score: float
 
 class DutyStatusUpdate(BaseModel):
     duty_status: bool
@@ -151,6 +349,7 @@ class DutyStatusUpdate(BaseModel):
 # Call Models
 class CallInitiate(BaseModel):
     advocate_id: str
+    law_type: Optional[str] = None  # Matter the client is calling about (analytics)
 
 class CallResponse(BaseModel):
     id: str
@@ -185,11 +384,28 @@ class TransactionResponse(BaseModel):
     timestamp: datetime
     reference: Optional[str] = None
 
+class WalletStatementResponse(BaseModel):
+    month: str
+    opening_balance: float
+    closing_balance: float
+    totals: dict
+    counts: dict
+    transaction_count: int
+    transactions: Optional[List[TransactionResponse]] = None
+
 # Admin Models
 class AdvocateVerification(BaseModel):
     status: Literal["approved", "rejected"]
     reason: Optional[str] = None
 
+class AdvocateVerificationItem(BaseModel):
+    advocate_id: str
+    status: Literal["approved", "rejected"]
+    reason: Optional[str] = None
+
+class AdvocateBulkVerification(BaseModel):
+    items: List[AdvocateVerificationItem] = Field(min_length=1, max_length=BULK_VERIFY_MAX_ITEMS)
+
 class AdminStats(BaseModel):
     total_users: int
     total_advocates: int
@@ -220,6 +436,7 @@ class MSG91RetryOTP(BaseModel):
 class ExotelCallInitiate(BaseModel):
     advocate_id: str
     client_phone: str
+    law_type: Optional[str] = None  # Matter the client is calling about (analytics)
 
 class ExotelCallStatus(BaseModel):
     call_sid: str
@@ -229,20 +446,475 @@ class ExotelCallStatus(BaseModel):
 
 # ========== HELPER FUNCTIONS ==========
 
+async def allocate_fid_block(count: int):
+    """
+    Reserve `count` consecutive FID numbers and return the first one.
+    
+    Numbers come from an atomic counter document, seeded once from the
+    highest FID already issued, so concurrent registrations and bulk
+    imports never hand out the same FID.
+    """
+    counter = await db.counters.find_one_and_update(
+        {"_id": FID_COUNTER_ID},
+        {"$inc": {"seq": count}},
+        return_document=ReturnDocument.AFTER
+    )
+    if counter is None:
+        last_advocate = await db.advocates.find_one({}, {"_id": 0, "fid_number": 1}, sort=[("fid_number", -1)])
+        seed = last_advocate.get("fid_number", 0) if last_advocate else 0
+        try:
+            await db.counters.insert_one({"_id": FID_COUNTER_ID, "seq": seed})
+        except DuplicateKeyError:
+            pass  # Another request seeded it first
+        counter = await db.counters.find_one_and_update(
+            {"_id": FID_COUNTER_ID},
+            {"$inc": {"seq": count}},
+            return_document=ReturnDocument.AFTER
+        )
+    return counter["seq"] - count + 1
+
+def format_fid(fid_number: int):
+    return f"FID-IND-{str(fid_number).zfill(6)}"
+
 async def generate_fid():
     """Generate unique FormuLAW ID"""
-    # Get the highest FID number
-    last_advocate = await db.advocates.find_one(
-        sort=[("fid_number", -1)]
+    next_number = await allocate_fid_block(1)
+    return format_fid(next_number), next_number
+
+def build_advocate_document(data: AdvocateRegister, fid_number: int):
+    """Build a new (pending) advocate document from registration data"""
+    advocate = {
+        "id": str(uuid.uuid4()),
+        "fid": format_fid(fid_number),
+        "fid_number": fid_number,
+        "email": data.email,
+        "role": "advocate",
+        "first_name": data.first_name,
+        "last_name": data.last_name,
+        "phone_number": data.phone_number,
+        "bar_council_id": data.bar_council_id,
+        "bar_council_issue_years": data.bar_council_issue_years,
+        "bar_council_issue_months": data.bar_council_issue_months,
+        "languages": data.languages,
+        "law_types": data.law_types,
+        "working_hours": data.working_hours,
+        "availability_mask": compile_working_hours(data.working_hours),
+        "area": data.area,
+        "city": data.city,
+        "state": data.state,
+        "location": geocode_city(data.city),
+        "per_minute_charge": data.per_minute_charge,
+        "verification_status": "pending",
+        "duty_status": False,
+        "average_rating": 0.0,
+        "rating_sum": 0,
+        "rating_count": 0,
+        "call_attempts": 0,
+        "call_completions": 0,
+        "total_cases": 0,
+        "token": None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "last_login": None
+    }
+    advocate.update(compute_rank_fields(advocate))
+    return advocate
+
+async def refresh_advocate_rank(advocate_id: str, advocate: Optional[dict] = None):
+    """Recompute and store an advocate's ranking fields (pass the document if already loaded)"""
+    if advocate is None:
+        advocate = await db.advocates.find_one({"id": advocate_id}, RANK_INPUT_PROJECTION)
+        if not advocate:
+            return
+    await db.advocates.update_one({"id": advocate_id}, {"$set": compute_rank_fields(advocate)})
+
+async def record_advocate_call_outcome(advocate_id: str, completed: bool):
+    """Fold a call outcome into the advocate's decayed completion counters and re-rank"""
+    advocate = await db.advocates.find_one_and_update(
+        {"id": advocate_id},
+        call_outcome_update(completed),
+        projection=RANK_INPUT_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    if advocate:
+        await refresh_advocate_rank(advocate_id, advocate)
+
+def advocate_is_busy(advocate: dict):
+    """True while an advocate holds an unexpired call lock"""
+    busy_until = advocate.get("busy_until")
+    if not advocate.get("busy_call_id") or not busy_until:
+        return False
+    if busy_until.tzinfo is None:
+        busy_until = busy_until.replace(tzinfo=timezone.utc)  # BSON dates come back naive (UTC)
+    return busy_until > datetime.now(timezone.utc)
+
+async def claim_advocate_for_call(advocate_id: str, call_id: str):
+    """Atomically mark an on-duty advocate busy with a call; returns False if already busy (or offline)"""
+    now = datetime.now(timezone.utc)
+    claimed = await db.advocates.find_one_and_update(
+        {
+            "id": advocate_id,
+            "duty_status": True,
+            "$or": [{"busy_call_id": None}, {"busy_until": {"$lt": now}}]
+        },
+        {"$set": {"busy_call_id": call_id, "busy_until": now + timedelta(seconds=BUSY_LOCK_TTL_SECONDS)}},
+        projection={"_id": 0, "id": 1}
+    )
+    return claimed is not None
+
+async def release_advocate_from_call(advocate_id: str, call_id: str):
+    """Release an advocate's call lock if it is still held by this call"""
+    await db.advocates.update_one(
+        {"id": advocate_id, "busy_call_id": call_id},
+        {"$set": {"busy_call_id": None, "busy_until": None}}
+    )
+
+def call_dimensions(advocate: dict, law_type: Optional[str] = None):
+    """City and law type snapshotted on a call for analytics rollups"""
+    law_types = advocate.get("law_types") or []
+    if law_type not in law_types:
+        # Fall back to the advocate's primary (first listed) practice area
+        law_type = law_types[0] if law_types else UNSPECIFIED
+    return {"city": advocate.get("city") or UNSPECIFIED, "law_type": law_type}
+
+async def record_call_rollups(call: dict, status: str, billed_minutes: int, total_cost: float, ended_at: datetime):
+    """Count a finished call into the analytics rollups, at most once per call"""
+    claimed = await db.calls.update_one({"id": call["id"], "rolled_up": {"$ne": True}}, {"$set": {"rolled_up": True}})
+    if not claimed.modified_count:
+        return
+    for collection, operation in rollup_operations(call, status, billed_minutes, total_cost, ended_at).items():
+        await db[collection].bulk_write([operation])
+
+def build_advocate_response(advocate: dict, distance_km: Optional[float] = None):
+    """Build the API representation of an advocate document"""
+    return AdvocateResponse(
+        id=advocate["id"],
+        fid=advocate["fid"],
+        email=advocate["email"],
+        first_name=advocate["first_name"],
+        last_name=advocate["last_name"],
+        phone_number=advocate["phone_number"],
+        bar_council_id=advocate["bar_council_id"],
+        bar_council_issue_years=advocate["bar_council_issue_years"],
+        bar_council_issue_months=advocate["bar_council_issue_months"],
+        languages=advocate["languages"],
+        law_types=advocate["law_types"],
+        working_hours=advocate["working_hours"],
+        area=advocate["area"],
+        city=advocate["city"],
+        state=advocate["state"],
+        per_minute_charge=advocate["per_minute_charge"],
+        verification_status=advocate["verification_status"],
+        duty_status=advocate["duty_status"],
+        is_busy=advocate_is_busy(advocate),
+        average_rating=advocate["average_rating"],
+        total_cases=advocate["total_cases"],
+        created_at=datetime.fromisoformat(advocate["created_at"]),
+        distance_km=round(distance_km, 2) if distance_km is not None else None
     )
+
+# Named advocate views; `fields=` may request any subset of the full view
+ADVOCATE_VIEWS = {
+    "full": tuple(AdvocateResponse.model_fields),
+    "card": tuple(AdvocateCard.model_fields),
+}
+# Response fields computed from other stored fields
+ADVOCATE_DERIVED_FIELDS = {
+    "is_busy": ("busy_call_id", "busy_until"),
+}
+# Custom `fields=` subsets each get a generated model; only the most recently used are kept
+ADVOCATE_VIEW_ADAPTER_CACHE_SIZE = 64
+
+def advocate_fieldset(fields: Optional[str], view: str) -> tuple:
+    """Response fields for a request: the comma-separated `fields` (id always included), else the named view"""
+    if not fields:
+        return ADVOCATE_VIEWS[view]
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(AdvocateResponse.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown advocate fields: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(field for field in AdvocateResponse.model_fields if field in requested)
+
+def advocate_projection(fieldset: tuple) -> dict:
+    """Mongo projection reading only what the fieldset needs (never token or other private fields)"""
+    projection = {"_id": 0}
+    for field in fieldset:
+        for stored in ADVOCATE_DERIVED_FIELDS.get(field, (field,)):
+            projection[stored] = 1
+    return projection
+
+@functools.lru_cache(maxsize=ADVOCATE_VIEW_ADAPTER_CACHE_SIZE)
+def advocate_view_adapter(fieldset: tuple):
+    """(model, list TypeAdapter) serializing exactly the fieldset"""
+    if fieldset == ADVOCATE_VIEWS["full"]:
+        model = AdvocateResponse
+    elif fieldset == ADVOCATE_VIEWS["card"]:
+        model = AdvocateCard
+    else:
+        model = create_model("AdvocateFields", **{
+            field: (AdvocateResponse.model_fields[field].annotation, AdvocateResponse.model_fields[field].default)
+            for field in fieldset
+        })
+    return model, TypeAdapter(List[model])
+
+def build_advocate_view(model, advocate: dict, fieldset: tuple, distance_km: Optional[float] = None):
+    """
+    Build a sparse advocate representation
     
-    if last_advocate and "fid_number" in last_advocate:
-        next_number = last_advocate["fid_number"] + 1
+    Values are taken as stored (the advocates collection is written through
+    validated models), so this skips per-row validation.
+    """
+    values = {}
+    for field in fieldset:
+        if field == "is_busy":
+            values[field] = advocate_is_busy(advocate)
+        elif field == "distance_km":
+            values[field] = round(distance_km, 2) if distance_km is not None else None
+        elif field == "created_at":
+            values[field] = datetime.fromisoformat(advocate["created_at"])
+        else:
+            values[field] = advocate[field]
+    return model.model_construct(**values)
+
+def build_wallet_document(user_id: str):
+    """Build an empty INR wallet"""
+    return {
+        "user_id": user_id,
+        "balance": 0.0,
+        "currency": "INR",
+        "transactions": []
+    }
+
+def parse_timestamp(value):
+    """Stored timestamp (ISO string or BSON date, naive meaning UTC) as an aware datetime"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def build_transaction_response(txn: dict):
+    return TransactionResponse(
+        type=txn["type"],
+        amount=txn["amount"],
+        timestamp=parse_timestamp(txn["timestamp"]),
+        reference=txn.get("reference")
+    )
+
+def before_timestamp(cutoff: datetime):
+    """Match transactions stamped before `cutoff`, whether stored as BSON dates or ISO strings"""
+    cutoff = cutoff.astimezone(timezone.utc)
+    return {"$or": [{"timestamp": {"$lt": cutoff}}, {"timestamp": {"$lt": cutoff.isoformat()}}]}
+
+def transaction_key(txn: dict):
+    return (parse_timestamp(txn["timestamp"]), txn["type"], txn["amount"], txn.get("reference"))
+
+async def compact_wallet(wallet: dict, cutoff: datetime):
+    """
+    Move a wallet's transactions from before `cutoff` into monthly statements.
+    
+    Statements are written before the transactions are pulled from the
+    wallet, and line items already in a statement are skipped, so a run
+    interrupted in between is completed by the next one.
+    """
+    user_id = wallet["user_id"]
+    transactions = wallet.get("transactions") or []
+    archived = sorted(
+        (txn for txn in transactions if parse_timestamp(txn["timestamp"]) < cutoff),
+        key=lambda txn: parse_timestamp(txn["timestamp"])
+    )
+    if not archived:
+        return 0
+    
+    by_month = {}
+    for txn in archived:
+        month = parse_timestamp(txn["timestamp"]).astimezone(IST).strftime("%Y-%m")
+        by_month.setdefault(month, []).append(txn)
+    
+    # Balance before the oldest archived month: the latest earlier statement, or derived
+    # from the current balance (every balance change is recorded as a transaction)
+    previous = await db.wallet_statements.find_one(
+        {"user_id": user_id, "month": {"$lt": min(by_month)}}, {"_id": 0, "closing_balance": 1}, sort=[("month", -1)]
+    )
+    if previous:
+        balance = previous["closing_balance"]
     else:
-        next_number = 1
+        balance = wallet.get("balance", 0) - sum(txn["amount"] for txn in transactions)
+    
+    for month, items in sorted(by_month.items()):
+        statement_id = f"{user_id}|{month}"
+        existing = await db.wallet_statements.find_one({"_id": statement_id}, {"transactions": 1, "closing_balance": 1})
+        if existing:
+            seen = {transaction_key(txn) for txn in existing.get("transactions", [])}
+            items = [txn for txn in items if transaction_key(txn) not in seen]
+        net = sum(txn["amount"] for txn in items)
+        totals, counts = {}, {}
+        for txn in items:
+            totals[txn["type"]] = totals.get(txn["type"], 0) + txn["amount"]
+            counts[txn["type"]] = counts.get(txn["type"], 0) + 1
+        
+        if existing:
+            if items:
+                await db.wallet_statements.update_one({"_id": statement_id}, {
+                    "$inc": {
+                        "closing_balance": net,
+                        "transaction_count": len(items),
+                        **{f"totals.{t}": amount for t, amount in totals.items()},
+                        **{f"counts.{t}": count for t, count in counts.items()}
+                    },
+                    "$push": {"transactions": {"$each": items}}
+                })
+            balance = existing["closing_balance"] + net
+            continue
+        
+        await db.wallet_statements.insert_one({
+            "_id": statement_id,
+            "user_id": user_id,
+            "month": month,
+            "opening_balance": round(balance, 2),
+            "closing_balance": round(balance + net, 2),
+            "totals": {t: round(amount, 2) for t, amount in totals.items()},
+            "counts": counts,
+            "transaction_count": len(items),
+            "transactions": items,
+            "created_at": datetime.now(timezone.utc)
+        })
+        balance += net
     
-    fid = f"FID-IND-{str(next_number).zfill(6)}"
-    return fid, next_number
+    for condition in before_timestamp(cutoff)["$or"]:
+        await db.wallets.update_one({"user_id": user_id}, {"$pull": {"transactions": condition}})
+    return len(archived)
+
+async def apply_call_wallet_entry(user_id: str, transaction: dict):
+    """
+    Apply a call charge or earning to a wallet at most once.
+    
+    The `wallet_ledger` entry (one per wallet, call and type) outlives
+    statement compaction, so a duplicate for an old call is still caught.
+    The transactions.call_id guard covers a crash between the wallet update
+    and marking the entry applied; recent transactions are never compacted.
+    """
+    entry_id = f"{user_id}|{transaction['call_id']}|{transaction['type']}"
+    entry = await db.wallet_ledger.find_one_and_update(
+        {"_id": entry_id},
+        {"$setOnInsert": {
+            "user_id": user_id,
+            "call_id": transaction["call_id"],
+            "type": transaction["type"],
+            "amount": transaction["amount"],
+            "applied": False,
+            "created_at": datetime.now(timezone.utc)
+        }},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    if entry.get("applied"):
+        return False
+    
+    result = await db.wallets.update_one(
+        {"user_id": user_id, "transactions.call_id": {"$ne": transaction["call_id"]}},
+        {"$inc": {"balance": transaction["amount"]}, "$push": {"transactions": transaction}}
+    )
+    await db.wallet_ledger.update_one({"_id": entry_id}, {"$set": {"applied": True}})
+    return result.modified_count == 1
+
+def parse_advocate_roster(content: str, roster_format: str):
+    """
+    Parse a CSV or NDJSON roster into (row_number, row_dict_or_error) pairs.
+    
+    CSV columns follow AdvocateRegister; `languages` and `law_types` are
+    separated by ';' or '|'.
+    """
+    rows = []
+    if roster_format == "ndjson":
+        for row_number, line in enumerate(content.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append((row_number, json.loads(line)))
+            except json.JSONDecodeError as e:
+                rows.append((row_number, f"Invalid JSON: {e.msg}"))
+        return rows
+    
+    reader = csv.DictReader(io.StringIO(content))
+    for row_number, row in enumerate(reader, start=1):
+        row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+        for field in ("languages", "law_types"):
+            if field in row:
+                row[field] = [item.strip() for item in row[field].replace("|", ";").split(";") if item.strip()]
+        rows.append((row_number, row))
+    return rows
+
+def format_validation_error(error: ValidationError):
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors())
+
+async def import_advocates(rows: List[tuple]):
+    """
+    Bulk-register advocates from parsed roster rows.
+    
+    Rows are validated against AdvocateRegister in batches; each batch does
+    one duplicate lookup, reserves a block of FIDs and inserts advocates and
+    wallets with unordered insert_many. Returns counts and per-row errors.
+    """
+    errors = []
+    imported = 0
+    seen_emails = set()
+    
+    for start in range(0, len(rows), IMPORT_BATCH_SIZE):
+        valid = []
+        for row_number, row in rows[start:start + IMPORT_BATCH_SIZE]:
+            if isinstance(row, str):
+                errors.append({"row": row_number, "error": row})
+                continue
+            try:
+                data = AdvocateRegister.model_validate(row)
+            except ValidationError as e:
+                errors.append({"row": row_number, "error": format_validation_error(e)})
+                continue
+            if data.email in seen_emails:
+                errors.append({"row": row_number, "email": data.email, "error": "Duplicate email in roster"})
+                continue
+            seen_emails.add(data.email)
+            valid.append((row_number, data))
+        
+        if not valid:
+            continue
+        
+        existing = await db.advocates.find(
+            {"email": {"$in": [data.email for _, data in valid]}},
+            {"_id": 0, "email": 1}
+        ).to_list(None)
+        existing_emails = {adv["email"] for adv in existing}
+        
+        to_insert = []
+        for row_number, data in valid:
+            if data.email in existing_emails:
+                errors.append({"row": row_number, "email": data.email, "error": "Advocate already registered"})
+            else:
+                to_insert.append((row_number, data))
+        
+        if not to_insert:
+            continue
+        
+        first_number = await allocate_fid_block(len(to_insert))
+        documents = [build_advocate_document(data, first_number + i) for i, (_, data) in enumerate(to_insert)]
+        
+        failed = set()
+        try:
+            await db.advocates.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                row_number, data = to_insert[error["index"]]
+                errors.append({"row": row_number, "email": data.email, "error": error.get("errmsg", "Insert failed")})
+        
+        inserted = [doc for i, doc in enumerate(documents) if i not in failed]
+        if inserted:
+            await db.wallets.insert_many([build_wallet_document(doc["id"]) for doc in inserted], ordered=False)
+        imported += len(inserted)
+    
+    errors.sort(key=lambda e: e["row"])
+    return {"total_rows": len(rows), "imported": imported, "failed": len(errors), "errors": errors}
 
 def generate_otp():
     """Generate 6-digit OTP"""
@@ -252,8 +924,27 @@ def generate_token():
     """Generate secure token"""
     return secrets.token_urlsafe(32)
 
+_resend = None
+
+def get_resend():
+    """Import and configure the Resend SDK on first use"""
+    global _resend
+    if _resend is None:
+        import resend
+        resend.api_key = os.environ.get('RESEND_API_KEY')
+        _resend = resend
+    return _resend
+
+def resend_send_email(params: dict):
+    """Send an email through Resend (blocking - run via asyncio.to_thread)"""
+    return get_resend().Emails.send(params)
+
+def resend_send_batch(params: List[dict]):
+    """Send up to RESEND_BATCH_SIZE emails in one Resend call (blocking - run via asyncio.to_thread)"""
+    return get_resend().Batch.send(params)
+
 async def send_otp_email(email: str, otp_code: str):
-    """Send OTP via email using Resend"""
+    """Send OTP via email using Resend; returns whether Resend accepted it"""
     try:
         params = {
             "from": SENDER_EMAIL,
@@ -282,145 +973,201 @@ async def send_otp_email(email: str, otp_code: str):
             """
         }
         # Run sync SDK in thread to keep FastAPI non-blocking
-        email_response = await asyncio.to_thread(resend.Emails.send, params)
+        email_response = await asyncio.to_thread(resend_send_email, params)
         logger.info(f"OTP email sent to {email}, ID: {email_response.get('id')}")
         return True
     except Exception as e:
         logger.error(f"Failed to send OTP email to {email}: {str(e)}")
-        # Return True anyway so flow continues - user can request resend
-        return True
+        return False
+
+def approval_email_params(email: str, advocate_name: str):
+    """Build the Resend payload for an advocate approval email"""
+    return {
+        "from": SENDER_EMAIL,
+        "to": [email],
+        "subject": "Your FormuLAW Advocate Account is Approved!",
+        "html": f"""
+        <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+            <div style="text-align: center; margin-bottom: 30px;">
+                <h1 style="color: #92400e; margin: 0;">FormuLAW</h1>
+                <p style="color: #a78bfa; font-size: 14px;">Say it • Seek it • Sorted</p>
+            </div>
+            <div style="background: #d1fae5; border-radius: 10px; padding: 30px;">
+                <h2 style="color: #065f46; margin-bottom: 20px;">Congratulations, {advocate_name}!</h2>
+                <p style="color: #047857; font-size: 16px;">
+                    Your Bar Council ID has been verified and your advocate account is now <strong>APPROVED</strong>.
+                </p>
+                <p style="color: #047857; font-size: 14px; margin-top: 20px;">
+                    You can now:
+                </p>
+                <ul style="color: #047857; font-size: 14px;">
+                    <li>Toggle your duty status to go online</li>
+                    <li>Receive consultation calls from clients</li>
+                    <li>Earn money for your legal expertise</li>
+                </ul>
+            </div>
+            <p style="color: #6b7280; font-size: 12px; text-align: center; margin-top: 30px;">
+                © 2026 FormuLAW - Legal Consultation Platform
+            </p>
+        </div>
+        """
+    }
 
 async def send_approval_email(email: str, advocate_name: str):
     """Send advocate approval email using Resend"""
     try:
-        params = {
-            "from": SENDER_EMAIL,
-            "to": [email],
-            "subject": "Your FormuLAW Advocate Account is Approved!",
-            "html": f"""
-            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-                <div style="text-align: center; margin-bottom: 30px;">
-                    <h1 style="color: #92400e; margin: 0;">FormuLAW</h1>
-                    <p style="color: #a78bfa; font-size: 14px;">Say it • Seek it • Sorted</p>
-                </div>
-                <div style="background: #d1fae5; border-radius: 10px; padding: 30px;">
-                    <h2 style="color: #065f46; margin-bottom: 20px;">Congratulations, {advocate_name}!</h2>
-                    <p style="color: #047857; font-size: 16px;">
-                        Your Bar Council ID has been verified and your advocate account is now <strong>APPROVED</strong>.
-                    </p>
-                    <p style="color: #047857; font-size: 14px; margin-top: 20px;">
-                        You can now:
-                    </p>
-                    <ul style="color: #047857; font-size: 14px;">
-                        <li>Toggle your duty status to go online</li>
-                        <li>Receive consultation calls from clients</li>
-                        <li>Earn money for your legal expertise</li>
-                    </ul>
-                </div>
-                <p style="color: #6b7280; font-size: 12px; text-align: center; margin-top: 30px;">
-                    © 2026 FormuLAW - Legal Consultation Platform
-                </p>
-            </div>
-            """
-        }
-        email_response = await asyncio.to_thread(resend.Emails.send, params)
+        params = approval_email_params(email, advocate_name)
+        email_response = await asyncio.to_thread(resend_send_email, params)
         logger.info(f"Approval email sent to {email}, ID: {email_response.get('id')}")
         return True
     except Exception as e:
         logger.error(f"Failed to send approval email to {email}: {str(e)}")
         return True
 
+async def send_approval_emails_batch(recipients: List[tuple]):
+    """Send approval emails for (email, advocate_name) pairs via the Resend batch API"""
+    for i in range(0, len(recipients), RESEND_BATCH_SIZE):
+        chunk = recipients[i:i + RESEND_BATCH_SIZE]
+        params = [approval_email_params(email, name) for email, name in chunk]
+        try:
+            await asyncio.to_thread(resend_send_batch, params)
+            logger.info(f"Approval email batch sent: {len(chunk)} recipients")
+        except Exception as e:
+            logger.error(f"Failed to send approval email batch of {len(chunk)}: {str(e)}")
+
+# ========== PROVIDER CLIENTS ==========
+
+# One breaker per provider, shared by every request in this process (see resilience.py)
+msg91_breaker = CircuitBreaker("msg91", PROVIDER_BREAKER_THRESHOLD, PROVIDER_BREAKER_RESET_SECONDS)
+exotel_breaker = CircuitBreaker("exotel", PROVIDER_BREAKER_THRESHOLD, PROVIDER_BREAKER_RESET_SECONDS)
+
+provider_clients = {}  # provider -> shared httpx.AsyncClient
+
+def provider_client(provider: str, read_timeout: float):
+    """Shared HTTP client for a provider, so connections are reused and timeouts stay tight"""
+    if provider not in provider_clients:
+        provider_clients[provider] = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=PROVIDER_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=PROVIDER_MAX_CONNECTIONS, max_keepalive_connections=20)
+        )
+    return provider_clients[provider]
+
+async def close_provider_clients():
+    for http in provider_clients.values():
+        await http.aclose()
+    provider_clients.clear()
+
 # ========== MSG91 HELPER FUNCTIONS ==========
 
-async def msg91_send_otp(mobile: str, email: Optional[str] = None):
+def normalize_mobile(mobile: str) -> str:
+    """Indian mobile number as 91XXXXXXXXXX (accepts +91, 0 or no prefix, spaces and dashes)"""
+    digits = re.sub(r"\D", "", mobile)
+    if len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    if len(digits) == 10:
+        digits = "91" + digits
+    return digits
+
+async def msg91_send_otp(mobile: str, email: Optional[str] = None, otp: Optional[str] = None):
     """
     Send OTP via MSG91 Direct OTP API (Server-side, no captcha)
     mobile: Phone number in format 91XXXXXXXXXX
     email: Optional email address for email OTP
+    otp: Optional code to send instead of one generated by MSG91
+    
+    Not retried - a second request would send a second OTP.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            # Clean mobile number - ensure 91 prefix
-            mobile_clean = mobile.replace("+", "").replace(" ", "")
-            if not mobile_clean.startswith("91"):
-                mobile_clean = "91" + mobile_clean.lstrip("0")
-            
-            payload = {
+        mobile_clean = normalize_mobile(mobile)
+        
+        payload = {
+            "mobile": mobile_clean,
+            "authkey": MSG91_AUTH_KEY,
+            "realTimeResponse": "1"
+        }
+        
+        # Add email if provided
+        if email:
+            payload["email"] = email
+        if otp:
+            payload["otp"] = otp
+        
+        http = provider_client("msg91", MSG91_TIMEOUT_SECONDS)
+        response = await call_provider(msg91_breaker, lambda: http.post(MSG91_OTP_URL, data=payload))
+        
+        logger.info(f"MSG91 sendOtp response: {response.status_code} - {response.text}")
+        
+        data = response.json()
+        
+        if data.get("type") == "success" or response.status_code == 200:
+            return {
+                "success": True,
+                "request_id": data.get("request_id"),
                 "mobile": mobile_clean,
-                "authkey": MSG91_AUTH_KEY,
-                "realTimeResponse": "1"
+                "message": "OTP sent successfully"
+            }
+        else:
+            return {
+                "success": False,
+                "request_id": None,
+                "message": data.get("message", "Failed to send OTP")
             }
-            
-            # Add email if provided
-            if email:
-                payload["email"] = email
-            
-            response = await client.post(
-                f"{MSG91_OTP_URL}",
-                data=payload,
-                timeout=30.0
-            )
-            
-            logger.info(f"MSG91 sendOtp response: {response.status_code} - {response.text}")
-            
-            data = response.json()
-            
-            if data.get("type") == "success" or response.status_code == 200:
-                return {
-                    "success": True,
-                    "request_id": data.get("request_id"),
-                    "mobile": mobile_clean,
-                    "message": "OTP sent successfully"
-                }
-            else:
-                return {
-                    "success": False,
-                    "request_id": None,
-                    "message": data.get("message", "Failed to send OTP")
-                }
     except Exception as e:
         logger.error(f"MSG91 sendOtp error: {str(e)}")
         return {"success": False, "request_id": None, "message": str(e)}
 
+def msg91_verified(response: httpx.Response) -> bool:
+    """
+    Successful verify, including MSG91's "already verified" reply: verify is
+    only called for a pending session, so that means an earlier attempt for
+    it succeeded and only its response was lost
+    """
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    message = str(data.get("message", "")).lower()
+    return data.get("type") == "success" or message == "otp verified success" or "already verified" in message
+
 async def msg91_verify_otp(mobile: str, otp: str):
     """
     Verify OTP via MSG91 Direct OTP API
     mobile: Phone number in format 91XXXXXXXXXX
     otp: OTP entered by user
+    
+    Verifying consumes the OTP at MSG91 and counts as an attempt there, so it
+    is neither hedged nor retried once sent; only connection failures before
+    the request went out are retried.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            # Clean mobile number
-            mobile_clean = mobile.replace("+", "").replace(" ", "")
-            if not mobile_clean.startswith("91"):
-                mobile_clean = "91" + mobile_clean.lstrip("0")
-            
-            params = {
-                "mobile": mobile_clean,
-                "otp": otp,
-                "authkey": MSG91_AUTH_KEY
+        mobile_clean = normalize_mobile(mobile)
+        
+        params = {
+            "mobile": mobile_clean,
+            "otp": otp,
+            "authkey": MSG91_AUTH_KEY
+        }
+        
+        http = provider_client("msg91", MSG91_TIMEOUT_SECONDS)
+        response = await call_provider(
+            msg91_breaker,
+            lambda: http.get(f"{MSG91_OTP_URL}/verify", params=params),
+            retries=MSG91_VERIFY_RETRIES,
+            retry_on=NOT_SENT_ERRORS
+        )
+        
+        logger.info(f"MSG91 verifyOtp response: {response.status_code} - {response.text}")
+        
+        if msg91_verified(response):
+            return {
+                "success": True,
+                "message": "OTP verified successfully"
+            }
+        else:
+            return {
+                "success": False,
+                "message": response.json().get("message", "Invalid OTP")
             }
-            
-            response = await client.get(
-                f"{MSG91_OTP_URL}/verify",
-                params=params,
-                timeout=30.0
-            )
-            
-            logger.info(f"MSG91 verifyOtp response: {response.status_code} - {response.text}")
-            
-            data = response.json()
-            
-            if data.get("type") == "success" or data.get("message") == "OTP verified success":
-                return {
-                    "success": True,
-                    "message": "OTP verified successfully"
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": data.get("message", "Invalid OTP")
-                }
     except Exception as e:
         logger.error(f"MSG91 verifyOtp error: {str(e)}")
         return {"success": False, "message": str(e)}
@@ -432,31 +1179,24 @@ async def msg91_retry_otp(mobile: str, retry_type: str = "text"):
     retry_type: text (SMS) or voice
     """
     try:
-        async with httpx.AsyncClient() as client:
-            # Clean mobile number
-            mobile_clean = mobile.replace("+", "").replace(" ", "")
-            if not mobile_clean.startswith("91"):
-                mobile_clean = "91" + mobile_clean.lstrip("0")
-            
-            params = {
-                "mobile": mobile_clean,
-                "authkey": MSG91_AUTH_KEY,
-                "retrytype": retry_type
-            }
-            
-            response = await client.get(
-                f"{MSG91_OTP_URL}/retry",
-                params=params,
-                timeout=30.0
-            )
-            
-            logger.info(f"MSG91 retryOtp response: {response.status_code} - {response.text}")
-            
-            data = response.json()
-            return {
-                "success": data.get("type") == "success",
-                "message": data.get("message", "")
-            }
+        mobile_clean = normalize_mobile(mobile)
+        
+        params = {
+            "mobile": mobile_clean,
+            "authkey": MSG91_AUTH_KEY,
+            "retrytype": retry_type
+        }
+        
+        http = provider_client("msg91", MSG91_TIMEOUT_SECONDS)
+        response = await call_provider(msg91_breaker, lambda: http.get(f"{MSG91_OTP_URL}/retry", params=params))
+        
+        logger.info(f"MSG91 retryOtp response: {response.status_code} - {response.text}")
+        
+        data = response.json()
+        return {
+            "success": data.get("type") == "success",
+            "message": data.get("message", "")
+        }
     except Exception as e:
         logger.error(f"MSG91 retryOtp error: {str(e)}")
         return {"success": False, "message": str(e)}
@@ -474,55 +1214,150 @@ async def exotel_initiate_call(from_number: str, to_number: str, call_id: str):
     Initiate a masked call via Exotel
     from_number: Client's phone (caller)
     to_number: Advocate's phone (callee)
+    
+    Not retried - a second request would place a second call.
     """
     try:
         # Clean phone numbers (remove +91 or 0 prefix)
         from_clean = from_number.replace("+91", "").replace(" ", "").lstrip("0")
         to_clean = to_number.replace("+91", "").replace(" ", "").lstrip("0")
         
-        async with httpx.AsyncClient() as client:
-            # Exotel Connect API URL - using configured subdomain (Singapore region)
-            url = f"https://{EXOTEL_SUBDOMAIN}/v1/Accounts/{EXOTEL_ACCOUNT_SID}/Calls/connect.json"
-            
-            payload = {
-                "From": from_clean,
-                "To": to_clean,
-                "CallerId": EXOTEL_EXOPHONE,
-                "CallType": "trans",
-                "StatusCallback": f"{os.environ.get('REACT_APP_BACKEND_URL', '')}/api/webhooks/exotel/status",
-                "StatusCallbackEvents[]": ["terminal"],
-                "CustomField": call_id  # Store our call ID for reference
+        # Exotel Connect API URL - using configured subdomain (Singapore region)
+        url = f"https://{EXOTEL_SUBDOMAIN}/v1/Accounts/{EXOTEL_ACCOUNT_SID}/Calls/connect.json"
+        
+        payload = {
+            "From": from_clean,
+            "To": to_clean,
+            "CallerId": EXOTEL_EXOPHONE,
+            "CallType": "trans",
+            "StatusCallback": f"{os.environ.get('REACT_APP_BACKEND_URL', '')}/api/webhooks/exotel/status",
+            "StatusCallbackEvents[]": ["terminal"],
+            "CustomField": call_id  # Store our call ID for reference
+        }
+        
+        headers = {
+            "Authorization": get_exotel_auth(),
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+        
+        http = provider_client("exotel", EXOTEL_TIMEOUT_SECONDS)
+        response = await call_provider(exotel_breaker, lambda: http.post(url, data=payload, headers=headers))
+        
+        logger.info(f"Exotel call initiate response: {response.status_code} - {response.text}")
+        
+        if response.status_code in [200, 201]:
+            data = response.json()
+            call_data = data.get("Call", {})
+            return {
+                "success": True,
+                "exotel_call_sid": call_data.get("Sid"),
+                "status": call_data.get("Status"),
+                "message": "Call initiated successfully"
             }
-            
-            headers = {
-                "Authorization": get_exotel_auth(),
-                "Content-Type": "application/x-www-form-urlencoded"
+        else:
+            return {
+                "success": False,
+                "exotel_call_sid": None,
+                "status": "failed",
+                "message": f"Failed to initiate call: {response.text}"
             }
-            
-            response = await client.post(url, data=payload, headers=headers, timeout=30.0)
-            
-            logger.info(f"Exotel call initiate response: {response.status_code} - {response.text}")
-            
-            if response.status_code in [200, 201]:
-                data = response.json()
-                call_data = data.get("Call", {})
-                return {
-                    "success": True,
-                    "exotel_call_sid": call_data.get("Sid"),
-                    "status": call_data.get("Status"),
-                    "message": "Call initiated successfully"
-                }
-            else:
-                return {
-                    "success": False,
-                    "exotel_call_sid": None,
-                    "status": "failed",
-                    "message": f"Failed to initiate call: {response.text}"
-                }
     except Exception as e:
         logger.error(f"Exotel call error: {str(e)}")
         return {"success": False, "exotel_call_sid": None, "status": "error", "message": str(e)}
 
+def date_range_filter(field: str, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Build a [start, end) filter on a date field.
+    
+    Dates are stored both as ISO strings and as BSON dates depending on the
+    code path that wrote them, so both representations are matched.
+    """
+    if not start and not end:
+        return {}
+    as_date, as_string = {}, {}
+    for op, value in (("$gte", start), ("$lt", end)):
+        if value:
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            value = value.astimezone(timezone.utc)
+            as_date[op] = value
+            as_string[op] = value.isoformat()
+    return {"$or": [{field: as_date}, {field: as_string}]}
+
+def earnings_periods(start: date, end: date, granularity: str):
+    """[(label, start, end)] for the whole IST days or calendar months covering [start, end]"""
+    periods = []
+    cursor = start.replace(day=1) if granularity == "month" else start
+    while cursor <= end:
+        if granularity == "month":
+            following = (cursor.replace(day=28) + timedelta(days=4)).replace(day=1)
+            label = cursor.strftime("%Y-%m")
+        else:
+            following = cursor + timedelta(days=1)
+            label = cursor.isoformat()
+        periods.append((
+            label,
+            datetime(cursor.year, cursor.month, cursor.day, tzinfo=IST),
+            datetime(following.year, following.month, following.day, tzinfo=IST)
+        ))
+        cursor = following
+    return periods
+
+async def aggregate_advocate_earnings(advocate_id: str, start: datetime, end: datetime, granularity: str):
+    """Per-period totals of an advocate's completed calls that ended in [start, end)"""
+    rows = await db.calls.aggregate([
+        {"$match": {"advocate_id": advocate_id, "end_time": {"$gte": start, "$lt": end}, "status": "completed"}},
+        {"$group": {
+            "_id": {"$dateToString": {
+                "format": "%Y-%m" if granularity == "month" else "%Y-%m-%d",
+                "date": "$end_time",
+                "timezone": "+05:30"
+            }},
+            "calls": {"$sum": 1},
+            "billed_minutes": {"$sum": {"$ifNull": ["$billed_minutes", 0]}},
+            "gross": {"$sum": {"$ifNull": ["$total_cost", 0]}},
+            # Calls billed before the share was recorded on the call use the current share
+            "earnings": {"$sum": {"$ifNull": [
+                "$advocate_earning",
+                {"$multiply": [{"$ifNull": ["$total_cost", 0]}, ADVOCATE_REVENUE_SHARE]}
+            ]}}
+        }}
+    ]).to_list(None)
+    return {
+        row["_id"]: {
+            "calls": row["calls"],
+            "billed_minutes": row["billed_minutes"],
+            "gross": round(row["gross"], 2),
+            "earnings": round(row["earnings"], 2),
+            "platform_fee": round(row["gross"] - row["earnings"], 2)
+        }
+        for row in rows
+    }
+
+def export_value(value):
+    """Convert a document value to a JSON/CSV friendly scalar"""
+    if isinstance(value, datetime):
+        # BSON dates come back naive (UTC)
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    return value
+
+def format_export_rows(docs: List[dict], fields: List[str], export_format: str) -> str:
+    """Render a batch of documents as NDJSON lines or CSV rows"""
+    if export_format == "ndjson":
+        return "".join(
+            json.dumps({f: export_value(doc.get(f)) for f in fields}, default=str) + "\n"
+            for doc in docs
+        )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for doc in docs:
+        row = []
+        for f in fields:
+            value = export_value(doc.get(f))
+            row.append(";".join(map(str, value)) if isinstance(value, list) else value)
+        writer.writerow(row)
+    return buffer.getvalue()
+
 async def get_current_user(authorization: Optional[str] = Header(None)):
     """Get current authenticated user from token"""
     if not authorization or not authorization.startswith("Bearer "):
@@ -551,15 +1386,566 @@ async def require_role(user: dict, allowed_roles: List[str]):
         raise HTTPException(status_code=403, detail="Insufficient permissions")
     return user
 
+# ========== ADVOCATE SEARCH ==========
+
+SEARCH_FIELD_WEIGHTS = {"fid": 3.0, "name": 3.0, "city": 2.0, "area": 1.0}
+SEARCH_MIN_SIMILARITY = 0.4
+SEARCH_FID_PREFIX_TOKENS = {"fid", "ind"}
+
+def search_tokens(text: str):
+    """Lowercase alphanumeric tokens of a string"""
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+def search_query_tokens(query: str):
+    """Query tokens, with the constant FID prefix (FID-IND-) dropped"""
+    return [token for token in search_tokens(query) if token not in SEARCH_FID_PREFIX_TOKENS]
+
+def edit_distance(a: str, b: str, limit: int):
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 if it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def trigrams(token: str):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class AdvocateSearchIndex:
+    """
+    In-process prefix + trigram index over approved advocates.
+    
+    Every field value is tokenized into a shared vocabulary. A query token
+    matches vocabulary tokens exactly, by prefix (type-ahead) or by trigram
+    Jaccard similarity (typo tolerance); an advocate must match every query
+    token and is ranked by the sum of its best field-weighted matches.
+    """
+    
+    def __init__(self, advocates: List[dict]):
+        self.advocates = advocates
+        self.postings = {}  # token -> {advocate index: best field weight}
+        for i, adv in enumerate(advocates):
+            fid_digits = (adv.get("fid") or "").rsplit("-", 1)[-1]
+            fields = {
+                "fid": [fid_digits, fid_digits.lstrip("0")],
+                "name": search_tokens(f"{adv.get('first_name', '')} {adv.get('last_name', '')}"),
+                "city": search_tokens(adv.get("city")),
+                "area": search_tokens(adv.get("area")),
+            }
+            for field, tokens in fields.items():
+                weight = SEARCH_FIELD_WEIGHTS[field]
+                for token in tokens:
+                    if not token:
+                        continue
+                    entry = self.postings.setdefault(token, {})
+                    entry[i] = max(entry.get(i, 0.0), weight)
+        self.vocabulary = sorted(self.postings)
+        self.trigram_index = {}
+        for token in self.vocabulary:
+            for gram in trigrams(token):
+                self.trigram_index.setdefault(gram, []).append(token)
+        self.built_at = time.monotonic()
+    
+    def _matching_tokens(self, query_token: str):
+        """Return {vocabulary token: similarity} for one query token"""
+        matches = {}
+        # Exact and prefix matches via the sorted vocabulary
+        start = bisect.bisect_left(self.vocabulary, query_token)
+        for token in itertools.islice(self.vocabulary, start, None):
+            if not token.startswith(query_token):
+                break
+            matches[token] = 1.0 if token == query_token else 0.6 + 0.3 * len(query_token) / len(token)
+        # Fuzzy matches for typos (not for FID numbers - a near miss is a different advocate)
+        if len(query_token) >= 3 and not query_token.isdigit():
+            max_edits = 1 if len(query_token) <= 6 else 2
+            query_grams = trigrams(query_token)
+            shared = {}
+            for gram in query_grams:
+                for token in self.trigram_index.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            for token, count in shared.items():
+                if token in matches:
+                    continue
+                similarity = count / (len(query_grams) + len(trigrams(token)) - count)
+                if similarity < SEARCH_MIN_SIMILARITY:
+                    # Transpositions and short-word typos share few trigrams
+                    distance = edit_distance(query_token, token, max_edits)
+                    if distance > max_edits:
+                        continue
+                    similarity = 1 - distance / max(len(query_token), len(token))
+                matches[token] = 0.8 * similarity
+        return matches
+    
+    def search(self, query: str, limit: int = 10):
+        """Return [(score, advocate)] best first"""
+        scores = None
+        for query_token in search_query_tokens(query):
+            token_scores = {}
+            for token, similarity in self._matching_tokens(query_token).items():
+                for i, weight in self.postings[token].items():
+                    token_scores[i] = max(token_scores.get(i, 0.0), similarity * weight)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {i: score + token_scores[i] for i, score in scores.items() if i in token_scores}
+            if not scores:
+                return []
+        if not scores:
+            return []
+        best = heapq.nlargest(
+            limit,
+            scores.items(),
+            key=lambda item: (item[1], self.advocates[item[0]].get("average_rating", 0))
+        )
+        return [(round(score, 3), self.advocates[i]) for i, score in best]
+
+SEARCH_PROJECTION = {
+    "_id": 0, "id": 1, "fid": 1, "first_name": 1, "last_name": 1, "area": 1, "city": 1,
+    "law_types": 1, "per_minute_charge": 1, "average_rating": 1, "duty_status": 1
+}
+
+class AdvocateSearchService:
+    """Holds the current search index and rebuilds it when stale"""
+    
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self.index = None
+        self.stale = True
+        self._lock = asyncio.Lock()
+    
+    def invalidate(self):
+        self.stale = True
+    
+    async def get_index(self):
+        fresh = self.index and not self.stale and time.monotonic() - self.index.built_at < self.refresh_seconds
+        if fresh:
+            return self.index
+        if self._lock.locked() and self.index:
+            return self.index  # Serve the previous index while a rebuild is running
+        async with self._lock:
+            if self.index and not self.stale and time.monotonic() - self.index.built_at < self.refresh_seconds:
+                return self.index
+            self.stale = False
+            advocates = await db.advocates.find({"verification_status": "approved"}, SEARCH_PROJECTION).to_list(None)
+            self.index = await asyncio.to_thread(AdvocateSearchIndex, advocates)
+            logger.info(f"Advocate search index rebuilt: {len(advocates)} advocates, {len(self.index.vocabulary)} tokens")
+            return self.index
+
+advocate_search = AdvocateSearchService(float(os.environ.get('ADVOCATE_SEARCH_REFRESH_SECONDS', 60)))
+
+# ========== PRESENCE ==========
+
+class PresenceRegistry:
+    """
+    In-memory advocate heartbeats.
+    
+    A heartbeat only touches this dict; last-seen times are written to
+    Mongo (`last_heartbeat_at`) in one unordered bulk_write per flush
+    interval, and the reaper works off the persisted times so it is
+    correct across processes.
+    """
+    
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.last_seen = {}  # advocate_id -> datetime (UTC)
+        self.dirty = set()
+    
+    def beat(self, advocate_id: str):
+        self.last_seen[advocate_id] = datetime.now(timezone.utc)
+        self.dirty.add(advocate_id)
+    
+    async def flush(self):
+        """Persist last-seen times of advocates that beat since the previous flush"""
+        if not self.dirty:
+            return 0
+        pending, self.dirty = self.dirty, set()
+        operations = [
+            UpdateOne({"id": advocate_id, "duty_status": True}, {"$set": {"last_heartbeat_at": self.last_seen[advocate_id]}})
+            for advocate_id in pending
+        ]
+        try:
+            for i in range(0, len(operations), PRESENCE_FLUSH_BATCH_SIZE):
+                await db.advocates.bulk_write(operations[i:i + PRESENCE_FLUSH_BATCH_SIZE], ordered=False)
+        except Exception:
+            self.dirty |= pending  # Retry on the next flush
+            raise
+        
+        # Forget advocates that have gone silent
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        for advocate_id in [a for a, seen in self.last_seen.items() if seen < cutoff and a not in self.dirty]:
+            del self.last_seen[advocate_id]
+        return len(operations)
+
+presence = PresenceRegistry(PRESENCE_TTL_SECONDS)
+
+# ========== CALL EVENTS ==========
+
+class CallEventWriter:
+    """
+    Group-committing writer for the append-only `call_events` collection.
+    
+    write() returns once the event is in Mongo, so callers can update the
+    call projection knowing the log already holds the event. Events written
+    concurrently share one unordered insert_many (up to `batch_size`) while
+    the previous batch is in flight. Failed batches are put back for the
+    periodic flush to retry and their writers see the error; events already
+    written on a previous attempt are skipped as duplicate keys. A writer
+    waits at most `timeout_seconds`, then fails with TimeoutError while its
+    event stays buffered for a later flush.
+    """
+    
+    def __init__(self, batch_size: int, timeout_seconds: float):
+        self.batch_size = batch_size
+        self.timeout_seconds = timeout_seconds
+        self.buffer = []
+        self.waiters = {}  # event id -> future resolved when the event is written
+        self.lock = asyncio.Lock()
+    
+    async def write(self, event: dict):
+        written = asyncio.get_running_loop().create_future()
+        self.waiters[event["id"]] = written
+        self.buffer.append(event)
+        # Flushed in its own task so a timed-out writer cannot cancel a batch mid-insert
+        spawn_background(self._flush_for_writers(), name="call_event_flush")
+        try:
+            await asyncio.wait_for(written, self.timeout_seconds)
+        except asyncio.TimeoutError:
+            self.waiters.pop(event["id"], None)
+            logger.error(f"Call event {event['status']} for call {event['call_id']} not written within {self.timeout_seconds}s")
+            raise
+    
+    async def _flush_for_writers(self):
+        try:
+            await self.flush()
+        except Exception:
+            pass  # Raised to the writers of the failed batch in flush()
+    
+    def _settle(self, events, error: Optional[Exception] = None):
+        for event in events:
+            waiter = self.waiters.pop(event["id"], None)
+            if waiter is None or waiter.done():
+                continue
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
+    
+    async def flush(self):
+        async with self.lock:
+            if not self.buffer:
+                return 0
+            events, self.buffer = self.buffer[:self.batch_size], self.buffer[self.batch_size:]
+            try:
+                await db.call_events.insert_many(events, ordered=False)
+            except BulkWriteError as e:
+                if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                    self.buffer = events + self.buffer
+                    self._settle(events, e)
+                    raise
+            except Exception as e:
+                self.buffer = events + self.buffer
+                self._settle(events, e)
+                raise
+            self._settle(events)
+            return len(events)
+
+call_events = CallEventWriter(CALL_EVENT_BATCH_SIZE, CALL_EVENT_WRITE_TIMEOUT_SECONDS)
+
+def new_call_event(call_id: str, status: str, source: str, fields: Optional[dict] = None, payload: Optional[dict] = None):
+    """Build a call event. `fields` are set on the call if the event is applied; `payload` is the raw provider data"""
+    return {
+        "id": str(uuid.uuid4()),
+        "call_id": call_id,
+        "status": status,
+        "source": source,
+        "fields": fields or {},
+        "payload": payload,
+        "created_at": datetime.now(timezone.utc)
+    }
+
+async def record_call_event(call_id: str, status: str, source: str, fields: Optional[dict] = None, payload: Optional[dict] = None):
+    """
+    Append a call event and project it onto the call document. The event is
+    in the log before the projection changes, so a replay never rolls the
+    call back.
+    
+    Returns True only if the call moved to `status`; side effects of a
+    transition (billing, releasing the advocate) must be gated on that.
+    """
+    event = new_call_event(call_id, status, source, fields, payload)
+    await call_events.write(event)
+    
+    if status not in CALL_STATE_RANK:
+        logger.warning(f"Call {call_id}: unknown status '{status}' from {source} recorded but not projected")
+        return False
+    
+    result = await db.calls.update_one(transition_filter(call_id, status), {"$set": transition_fields(event)})
+    if not result.modified_count:
+        logger.info(f"Call {call_id}: {source} status '{status}' ignored (duplicate or out of order)")
+    return result.modified_count == 1
+
+async def replay_call_events(call_id: str):
+    """Rebuild a call's lifecycle fields from its event log. Billing and other side effects are not re-run"""
+    await call_events.flush()
+    events = await db.call_events.find({"call_id": call_id}, {"_id": 0}).sort("created_at", 1).to_list(None)
+    projection = project_call_events(events)
+    if projection:
+        await db.calls.update_one({"id": call_id}, {"$set": projection})
+    return events, projection
+
+# ========== WEBHOOK INBOX ==========
+
+webhook_inbox_wakeup = asyncio.Event()
+
+def webhook_dedupe_key(provider: str, *parts, payload: Optional[dict] = None):
+    """Idempotency key for a delivery - the provider's identifiers, or a hash of the payload if any are missing"""
+    if parts and all(parts):
+        return ":".join([provider, *map(str, parts)])
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{provider}:sha256:{digest}"
+
+async def receive_webhook(provider: str, dedupe_key: str, payload: dict):
+    """Persist a webhook delivery to the inbox; returns False for a redelivery of a stored one"""
+    now = datetime.now(timezone.utc)
+    try:
+        await db.webhook_inbox.insert_one({
+            "id": str(uuid.uuid4()),
+            "provider": provider,
+            "dedupe_key": dedupe_key,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "received_at": now
+        })
+    except DuplicateKeyError:
+        logger.info(f"Webhook {dedupe_key} already received, skipping")
+        return False
+    webhook_inbox_wakeup.set()
+    return True
+
+async def claim_webhook():
+    """Lease the next due inbox item (or one whose worker's lease expired)"""
+    now = datetime.now(timezone.utc)
+    return await db.webhook_inbox.find_one_and_update(
+        {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "processing", "locked_until": {"$lt": now}}
+        ]},
+        {
+            "$set": {"status": "processing", "locked_until": now + timedelta(seconds=WEBHOOK_LEASE_SECONDS)},
+            "$inc": {"attempts": 1}
+        },
+        sort=[("next_attempt_at", 1)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+async def settle_webhook(item: dict, error: Optional[Exception] = None):
+    """Mark an inbox item done, schedule a retry with backoff, or dead-letter it after the last attempt"""
+    now = datetime.now(timezone.utc)
+    if error is None:
+        update = {"status": "done", "processed_at": now, "locked_until": None}
+    elif item["attempts"] >= WEBHOOK_MAX_ATTEMPTS:
+        logger.error(f"Webhook {item['dedupe_key']} dead-lettered after {item['attempts']} attempts: {str(error)}")
+        update = {"status": "dead_letter", "last_error": str(error), "locked_until": None}
+    else:
+        delay = min(WEBHOOK_RETRY_BASE_SECONDS * 2 ** (item["attempts"] - 1), WEBHOOK_RETRY_MAX_SECONDS)
+        logger.warning(f"Webhook {item['dedupe_key']} attempt {item['attempts']} failed, retrying in {delay}s: {str(error)}")
+        update = {
+            "status": "pending",
+            "next_attempt_at": now + timedelta(seconds=delay),
+            "last_error": str(error),
+            "locked_until": None
+        }
+    await db.webhook_inbox.update_one({"id": item["id"]}, {"$set": update})
+
+# ========== READ COALESCING ==========
+
+single_flights = {}  # name -> SingleFlight, reported by /admin/metrics
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical reads.
+    
+    The first caller for a key runs the loader; callers arriving while it is
+    in flight await the same result instead of issuing their own query. A
+    successful result is also kept for `ttl_seconds` (0 disables this).
+    Loaders should return serialized bytes so the encoding work is shared too.
+    """
+    
+    def __init__(self, name: str, ttl_seconds: float = 0, max_entries: int = READ_COALESCE_MAX_ENTRIES):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.inflight = {}  # key -> Future
+        self.cache = {}  # key -> (expires_at monotonic, value)
+        self.stats = {"calls": 0, "hits": 0, "coalesced": 0, "loads": 0, "errors": 0}
+        single_flights[name] = self
+    
+    async def do(self, key, loader):
+        self.stats["calls"] += 1
+        cached = self.cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            self.stats["hits"] += 1
+            return cached[1]
+        
+        future = self.inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+        
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        self.stats["loads"] += 1
+        try:
+            value = await loader()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                self.stats["errors"] += 1
+            future.set_exception(e)
+            future.exception()  # Retrieved here so an unawaited future is not logged
+            raise
+        else:
+            future.set_result(value)
+            if self.ttl_seconds > 0:
+                self.store(key, value)
+            return value
+        finally:
+            del self.inflight[key]
+    
+    def store(self, key, value):
+        now = time.monotonic()
+        if len(self.cache) >= self.max_entries:
+            for stale in [k for k, (expires_at, _) in self.cache.items() if expires_at <= now]:
+                del self.cache[stale]
+            while len(self.cache) >= self.max_entries:
+                del self.cache[next(iter(self.cache))]
+        self.cache[key] = (now + self.ttl_seconds, value)
+    
+    def snapshot(self):
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "inflight": len(self.inflight),
+            "cached": len(self.cache),
+            "shared_ratio": round((self.stats["hits"] + self.stats["coalesced"]) / calls, 4) if calls else 0.0
+        }
+
+advocate_reads = SingleFlight("advocates", READ_COALESCE_TTL_SECONDS)
+reference_data = SingleFlight("reference_data", REFERENCE_DATA_TTL_SECONDS)
+
+def json_bytes_response(body: bytes):
+    """Fresh response around a shared pre-serialized JSON body"""
+    return Response(content=body, media_type="application/json")
+
+# ========== OTP DISPATCH ==========
+
+OTP_CHANNEL_STATS = {}  # channel -> delivery counters, reported by /admin/metrics
+
+def msg91_accepted(result: dict) -> bool:
+    return result["success"]
+
+def record_otp_channel(channel: str, delivered: bool, latency_ms: float):
+    stats = OTP_CHANNEL_STATS.setdefault(channel, {"sent": 0, "failed": 0, "first": 0, "latency_ms": 0.0})
+    if not delivered:
+        stats["failed"] += 1
+        return
+    stats["sent"] += 1
+    stats["latency_ms"] = latency_ms if stats["sent"] == 1 else 0.8 * stats["latency_ms"] + 0.2 * latency_ms
+
+async def send_otp_channel(channel: str, send, accepted=bool):
+    """Run one channel's send, timing how long the provider took to accept it"""
+    started = time.perf_counter()
+    try:
+        delivered = accepted(await send)
+    except Exception as e:
+        logger.error(f"OTP {channel} delivery error: {str(e)}")
+        delivered = False
+    latency_ms = (time.perf_counter() - started) * 1000
+    record_otp_channel(channel, delivered, latency_ms)
+    return channel, delivered, latency_ms
+
+async def escalate_otp_to_voice(email: str, otp_code: str, mobile: str):
+    """Re-send the code as a voice call if it is still unused after OTP_VOICE_ESCALATION_SECONDS"""
+    await asyncio.sleep(OTP_VOICE_ESCALATION_SECONDS)
+    if not await db.otps.find_one({"email": email, "otp_code": otp_code, "verified": False}, {"_id": 1}):
+        return
+    _, delivered, latency_ms = await send_otp_channel("voice", msg91_retry_otp(mobile, "voice"), msg91_accepted)
+    logger.info(f"OTP for {email} escalated to voice: delivered={delivered} in {latency_ms:.0f} ms")
+
+async def account_mobile(email: str, role: str) -> Optional[str]:
+    """Mobile stored on the account for an OTP login, if any (never one supplied by the caller)"""
+    accounts = {"client": db.users, "advocate": db.advocates, "admin": db.admins}[role]
+    account = await accounts.find_one({"email": email}, {"_id": 0, "phone_number": 1})
+    phone_number = (account or {}).get("phone_number")
+    return normalize_mobile(phone_number) if phone_number else None
+
+async def dispatch_otp(email: str, otp_code: str, mobile: Optional[str] = None):
+    """
+    Send one login code on every configured channel concurrently
+    
+    - email (Resend) always; SMS (MSG91, same code) to the account's stored
+      mobile, if it has one
+    - Returns as soon as the first channel is accepted, so login waits only
+      for the fastest channel; the others finish in the background
+    - With SMS, a voice call follows after OTP_VOICE_ESCALATION_SECONDS
+      unless the code has been used
+    
+    Returns (first delivered channel or None, {channel: delivered}); channels
+    still sending when the first one is accepted are reported as None.
+    """
+    sends = [send_otp_channel("email", send_otp_email(email, otp_code))]
+    channels = ["email"]
+    if mobile and MSG91_AUTH_KEY:
+        sends.append(send_otp_channel("sms", msg91_send_otp(mobile, otp=otp_code), msg91_accepted))
+        channels.append("sms")
+    tasks = [asyncio.ensure_future(send) for send in sends]
+    
+    first = None
+    results = dict.fromkeys(channels)
+    for next_done in asyncio.as_completed(tasks):
+        channel, delivered, _ = await next_done
+        results[channel] = delivered
+        if delivered:
+            first = channel
+            OTP_CHANNEL_STATS[channel]["first"] += 1
+            break
+    if any(not task.done() for task in tasks):
+        spawn_background(asyncio.wait(tasks), name=f"otp_dispatch_{email}")  # Let the slower channels finish
+    
+    # Voice re-sends the SMS session, so it is only worth scheduling once a channel went out
+    if first and "sms" in channels:
+        spawn_background(
+            escalate_otp_to_voice(email, otp_code, mobile), name=f"otp_voice_{email}", cancel_on_shutdown=True
+        )
+    return first, results
+
 # ========== AUTH ENDPOINTS ==========
 
 @api_router.post("/auth/send-otp")
 async def send_otp(data: OTPCreate):
-    """Send OTP to email"""
+    """
+    Send OTP to email, and by SMS too when the account has a phone number
+    on file (see dispatch_otp)
+    
+    Responds 502 with the per-channel results when no channel accepted the code.
+    """
     try:
         # Generate OTP
         otp_code = generate_otp()
-        expires_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=OTP_EXPIRY_SECONDS)
+        mobile = await account_mobile(data.email, data.role)
         
         # Save OTP to database
         otp_doc = {
@@ -567,7 +1953,8 @@ async def send_otp(data: OTPCreate):
             "otp_code": otp_code,
             "expires_at": expires_at.isoformat(),
             "verified": False,
-            "role": data.role
+            "role": data.role,
+            "mobile": mobile
         }
         
         # Delete old OTPs for this email
@@ -576,10 +1963,22 @@ async def send_otp(data: OTPCreate):
         # Insert new OTP
         await db.otps.insert_one(otp_doc)
         
-        # Send email
-        await send_otp_email(data.email, otp_code)
+        delivered_via, results = await dispatch_otp(data.email, otp_code, mobile)
         
-        return {"message": "OTP sent successfully", "expires_in": 60}
+        if delivered_via is None:
+            # No channel took the code, so nobody can use it
+            await db.otps.delete_one({"email": data.email, "otp_code": otp_code})
+            return JSONResponse(
+                status_code=502,
+                content={"detail": "Could not deliver the OTP. Please try again.", "channels": results}
+            )
+        
+        return {
+            "message": "OTP sent successfully",
+            "expires_in": OTP_EXPIRY_SECONDS,
+            "channels": list(results),
+            "delivered_via": delivered_via
+        }
     
     except Exception as e:
         logger.error(f"Error sending OTP: {str(e)}")
@@ -633,13 +2032,7 @@ async def verify_otp(data: OTPVerify):
                 await db.users.insert_one(user)
                 
                 # Create wallet
-                wallet = {
-                    "user_id": user_id,
-                    "balance": 0.0,
-                    "currency": "INR",
-                    "transactions": []
-                }
-                await db.wallets.insert_one(wallet)
+                await db.wallets.insert_one(build_wallet_document(user_id))
             else:
                 # Update token and last login
                 await db.users.update_one(
@@ -710,103 +2103,145 @@ async def get_me(current_user: dict = Depends(get_current_user)):
 
 # ========== CLIENT ENDPOINTS ==========
 
-@api_router.get("/client/advocates", response_model=List[AdvocateResponse])
+@api_router.get(
+    "/client/advocates",
+    response_model=None,
+    responses={200: {
+        "model": Union[List[AdvocateResponse], List[AdvocateCard]],
+        "description": "AdvocateResponse items (view=full), AdvocateCard items (view=card), "
+                       "or only the requested AdvocateResponse fields plus id (fields=)"
+    }}
+)
 async def get_advocates(
     law_type: Optional[str] = None,
     city: Optional[str] = None,
     language: Optional[str] = None,
-    sort_by: Optional[str] = "newest",
+    sort_by: Optional[str] = "recommended",
+    near_lat: Optional[float] = Query(None, ge=-90, le=90),
+    near_lng: Optional[float] = Query(None, ge=-180, le=180),
+    near_city: Optional[str] = None,
+    radius_km: float = Query(DEFAULT_NEAR_RADIUS_KM, gt=0, le=MAX_NEAR_RADIUS_KM),
+    available_now: bool = True,
+    fields: Optional[str] = None,
+    view: Literal["full", "card"] = "full",
     current_user: dict = Depends(get_current_user)
 ):
-    """Get list of advocates with filters"""
-    await require_role(current_user, ["client"])
+    """
+    Get list of advocates with filters
     
-    # Build filter query
-    query = {
-        "verification_status": "approved",
-        "duty_status": True
-    }
+    view=card returns the compact listing (AdvocateCard); fields= returns a
+    comma-separated subset of AdvocateResponse instead. Only those fields are
+    read from Mongo.
     
-    if law_type:
-        query["law_types"] = law_type
+    Identical concurrent requests share one query and response body (see
+    SingleFlight), reused for READ_COALESCE_TTL_SECONDS.
     
-    if city:
-        query["city"] = city
+    Near-me mode: pass near_lat/near_lng (or near_city) and radius_km to get
+    advocates within that radius, nearest first, with distance_km set. The
+    exact city filter and sort_by are ignored in this mode.
     
-    if language:
-        query["languages"] = language
+    available_now (default) also requires the current IST hour to be within
+    the advocate's declared working hours; advocates without a compiled
+    availability_mask are treated as always available.
+    """
+    await require_role(current_user, ["client"])
     
-    # Build sort
-    sort_options = {
-        "newest": [("created_at", -1)],
-        "rating": [("average_rating", -1)],
-        "price_low": [("per_minute_charge", 1)],
-        "price_high": [("per_minute_charge", -1)]
-    }
-    sort = sort_options.get(sort_by, [("created_at", -1)])
+    near_point = None
+    if near_lat is not None and near_lng is not None:
+        near_point = {"type": "Point", "coordinates": [near_lng, near_lat]}
+    elif near_city:
+        near_point = geocode_city(near_city)
+        if not near_point:
+            raise HTTPException(status_code=400, detail=f"Unknown city: {near_city}")
+    
+    if sort_by not in ADVOCATE_SORT_OPTIONS:
+        sort_by = "recommended"
+    bucket = hour_of_week() if available_now else None
+    fieldset = advocate_fieldset(fields, view)
+    key = (
+        "list", law_type, None if near_point else city, language, sort_by,
+        json.dumps(near_point, sort_keys=True) if near_point else None,
+        radius_km if near_point else None, bucket, fieldset
+    )
     
-    advocates = await db.advocates.find(query, {"_id": 0}).sort(sort).to_list(100)
+    async def load():
+        # Build filter query
+        query = {
+            "verification_status": "approved",
+            "duty_status": True
+        }
+        
+        if law_type:
+            query["law_types"] = law_type
+        
+        if city and not near_point:
+            query["city"] = city
+        
+        if language:
+            query["languages"] = language
+        
+        if available_now:
+            # Advocates not yet backfilled by `migrate.py availability` have no mask and count as always available
+            query["$or"] = [
+                {"availability_mask": {"$exists": False}},
+                {"availability_mask": {"$bitsAllSet": [bucket]}}
+            ]
+        
+        projection = advocate_projection(fieldset)
+        if near_point:
+            advocates = await db.advocates.aggregate([
+                {"$geoNear": {
+                    "near": near_point,
+                    "key": "location",
+                    "distanceField": "distance_km",
+                    "distanceMultiplier": 0.001,
+                    "maxDistance": radius_km * 1000,
+                    "query": query,
+                    "spherical": True
+                }},
+                {"$limit": 100},
+                {"$project": {**projection, "distance_km": 1}}
+            ]).to_list(100)
+        else:
+            sort = ADVOCATE_SORT_OPTIONS[sort_by]
+            advocates = await db.advocates.find(query, projection).sort(sort).to_list(100)
+        
+        model, adapter = advocate_view_adapter(fieldset)
+        return adapter.dump_json([
+            build_advocate_view(model, adv, fieldset, distance_km=adv.get("distance_km")) for adv in advocates
+        ])
     
-    result = []
-    for adv in advocates:
-        result.append(AdvocateResponse(
-            id=adv["id"],
-            fid=adv["fid"],
-            email=adv["email"],
-            first_name=adv["first_name"],
-            last_name=adv["last_name"],
-            phone_number=adv["phone_number"],
-            bar_council_id=adv["bar_council_id"],
-            bar_council_issue_years=adv["bar_council_issue_years"],
-            bar_council_issue_months=adv["bar_council_issue_months"],
-            languages=adv["languages"],
-            law_types=adv["law_types"],
-            working_hours=adv["working_hours"],
-            area=adv["area"],
-            city=adv["city"],
-            state=adv["state"],
-            per_minute_charge=adv["per_minute_charge"],
-            verification_status=adv["verification_status"],
-            duty_status=adv["duty_status"],
-            average_rating=adv["average_rating"],
-            total_cases=adv["total_cases"],
-            created_at=datetime.fromisoformat(adv["created_at"])
-        ))
+    return json_bytes_response(await advocate_reads.do(key, load))
+
+@api_router.get("/client/advocates/search", response_model=List[AdvocateSearchHit])
+async def search_advocates(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Type-ahead advocate search by name, FID, city or area
     
-    return result
+    Served from an in-process index (prefix + trigram matching), so it is
+    cheap enough to call on every keystroke and tolerates misspellings.
+    """
+    await require_role(current_user, ["client"])
+    
+    index = await advocate_search.get_index()
+    return [AdvocateSearchHit(score=score, **adv) for score, adv in index.search(q, limit)]
 
 @api_router.get("/client/advocate/{advocate_id}", response_model=AdvocateResponse)
 async def get_advocate(advocate_id: str, current_user: dict = Depends(get_current_user)):
     """Get advocate details"""
     await require_role(current_user, ["client"])
     
-    advocate = await db.advocates.find_one({"id": advocate_id}, {"_id": 0})
-    if not advocate:
-        raise HTTPException(status_code=404, detail="Advocate not found")
+    async def load():
+        advocate = await db.advocates.find_one({"id": advocate_id}, advocate_projection(ADVOCATE_VIEWS["full"]))
+        if not advocate:
+            raise HTTPException(status_code=404, detail="Advocate not found")
+        return build_advocate_response(advocate).model_dump_json().encode()
     
-    return AdvocateResponse(
-        id=advocate["id"],
-        fid=advocate["fid"],
-        email=advocate["email"],
-        first_name=advocate["first_name"],
-        last_name=advocate["last_name"],
-        phone_number=advocate["phone_number"],
-        bar_council_id=advocate["bar_council_id"],
-        bar_council_issue_years=advocate["bar_council_issue_years"],
-        bar_council_issue_months=advocate["bar_council_issue_months"],
-        languages=advocate["languages"],
-        law_types=advocate["law_types"],
-        working_hours=advocate["working_hours"],
-        area=advocate["area"],
-        city=advocate["city"],
-        state=advocate["state"],
-        per_minute_charge=advocate["per_minute_charge"],
-        verification_status=advocate["verification_status"],
-        duty_status=advocate["duty_status"],
-        average_rating=advocate["average_rating"],
-        total_cases=advocate["total_cases"],
-        created_at=datetime.fromisoformat(advocate["created_at"])
-    )
+    return json_bytes_response(await advocate_reads.do(("detail", advocate_id), load))
 
 @api_router.post("/client/initiate-call")
 async def initiate_call(data: CallInitiate, current_user: dict = Depends(get_current_user)):
@@ -821,6 +2256,10 @@ async def initiate_call(data: CallInitiate, current_user: dict = Depends(get_cur
     if not advocate["duty_status"]:
         raise HTTPException(status_code=400, detail="Advocate is currently offline")
     
+    # Placeholder flow places no real call, so it only checks the lock (see exotel_initiate_call_endpoint)
+    if advocate_is_busy(advocate):
+        raise HTTPException(status_code=409, detail="Advocate is on another call. Please try again shortly.")
+    
     # Check wallet balance
     wallet = await db.wallets.find_one({"user_id": current_user["id"]}, {"_id": 0})
     if not wallet or wallet["balance"] < advocate["per_minute_charge"]:
@@ -844,9 +2283,13 @@ async def initiate_call(data: CallInitiate, current_user: dict = Depends(get_cur
         "total_cost": None,
         "masked_number": None,
         "rating": None,
+        **call_dimensions(advocate, data.law_type),
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
+    event = new_call_event(call_id, "initiated", "api")
+    call.update(transition_fields(event))
+    await call_events.write(event)
     await db.calls.insert_one(call)
     
     # TODO: Initiate Twilio call
@@ -920,19 +2363,19 @@ async def rate_call(data: CallRating, current_user: dict = Depends(get_current_u
         {"$set": {"rating": data.rating}}
     )
     
-    # Update advocate average rating
-    advocate_calls = await db.calls.find(
-        {"advocate_id": call["advocate_id"], "rating": {"$ne": None}},
-        {"_id": 0, "rating": 1}
-    ).to_list(1000)
-    
-    total_rating = sum([c.get("rating", 0) for c in advocate_calls]) + data.rating
-    avg_rating = total_rating / (len(advocate_calls) + 1)
-    
-    await db.advocates.update_one(
+    # Update advocate rating incrementally and re-rank
+    advocate = await db.advocates.find_one_and_update(
         {"id": call["advocate_id"]},
-        {"$set": {"average_rating": round(avg_rating, 2)}}
+        {"$inc": {"rating_sum": data.rating, "rating_count": 1}},
+        projection=RANK_INPUT_PROJECTION,
+        return_document=ReturnDocument.AFTER
     )
+    if advocate:
+        avg_rating = advocate["rating_sum"] / advocate["rating_count"]
+        await db.advocates.update_one(
+            {"id": call["advocate_id"]},
+            {"$set": {"average_rating": round(avg_rating, 2), **compute_rank_fields(advocate)}}
+        )
     
     return {"message": "Rating submitted successfully"}
 
@@ -968,10 +2411,7 @@ async def topup_wallet(data: WalletTopup, current_user: dict = Depends(get_curre
     # if payment['status'] != 'captured':
     #     raise HTTPException(status_code=400, detail="Payment not successful")
     
-    # Update wallet
-    wallet = await db.wallets.find_one({"user_id": current_user["id"]}, {"_id": 0})
-    new_balance = wallet["balance"] + data.amount
-    
+    # Update wallet ($inc so a call charge landing at the same time is not lost)
     transaction = {
         "type": "credit",
         "amount": data.amount,
@@ -979,39 +2419,74 @@ async def topup_wallet(data: WalletTopup, current_user: dict = Depends(get_curre
         "reference": data.razorpay_payment_id
     }
     
-    await db.wallets.update_one(
+    wallet = await db.wallets.find_one_and_update(
         {"user_id": current_user["id"]},
         {
-            "$set": {"balance": new_balance},
+            "$inc": {"balance": data.amount},
             "$push": {"transactions": transaction}
-        }
+        },
+        projection={"_id": 0, "balance": 1},
+        return_document=ReturnDocument.AFTER
     )
+    if not wallet:
+        raise HTTPException(status_code=404, detail="Wallet not found")
     
     return {
         "message": "Wallet topped up successfully",
-        "new_balance": new_balance
+        "new_balance": wallet["balance"]
     }
 
 @api_router.get("/client/wallet/transactions", response_model=List[TransactionResponse])
 async def get_transactions(current_user: dict = Depends(get_current_user)):
-    """Get wallet transaction history"""
+    """Get recent wallet transactions (older months are in /client/wallet/statements)"""
     await require_role(current_user, ["client"])
     
-    wallet = await db.wallets.find_one({"user_id": current_user["id"]}, {"_id": 0})
+    wallet = await db.wallets.find_one({"user_id": current_user["id"]}, {"_id": 0, "transactions": 1})
     if not wallet:
         raise HTTPException(status_code=404, detail="Wallet not found")
     
-    transactions = wallet.get("transactions", [])
-    result = []
-    for txn in transactions:
-        result.append(TransactionResponse(
-            type=txn["type"],
-            amount=txn["amount"],
-            timestamp=datetime.fromisoformat(txn["timestamp"]),
-            reference=txn.get("reference")
-        ))
+    return [build_transaction_response(txn) for txn in wallet.get("transactions", [])]
+
+@api_router.get("/client/wallet/statements", response_model=List[WalletStatementResponse])
+async def get_wallet_statements(
+    response: Response,
+    before: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    limit: int = Query(12, ge=1, le=MAX_STATEMENTS_PAGE),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Monthly wallet statements, newest first
     
-    return result
+    - Pass the X-Next-Before header value as `before` to get the next page
+    - Line items are returned by /client/wallet/statements/{month}
+    """
+    await require_role(current_user, ["client"])
+    
+    query = {"user_id": current_user["id"]}
+    if before:
+        query["month"] = {"$lt": before}
+    
+    statements = await db.wallet_statements.find(
+        query, {"_id": 0, "transactions": 0}
+    ).sort("month", -1).limit(limit + 1).to_list(limit + 1)
+    
+    if len(statements) > limit:
+        statements = statements[:limit]
+        response.headers["X-Next-Before"] = statements[-1]["month"]
+    
+    return [WalletStatementResponse(**statement) for statement in statements]
+
+@api_router.get("/client/wallet/statements/{month}", response_model=WalletStatementResponse)
+async def get_wallet_statement(month: str, current_user: dict = Depends(get_current_user)):
+    """Get one monthly statement with its line items"""
+    await require_role(current_user, ["client"])
+    
+    statement = await db.wallet_statements.find_one({"_id": f"{current_user['id']}|{month}"}, {"_id": 0})
+    if not statement:
+        raise HTTPException(status_code=404, detail="Statement not found")
+    
+    statement["transactions"] = [build_transaction_response(txn) for txn in statement.get("transactions", [])]
+    return WalletStatementResponse(**statement)
 
 # ========== ADVOCATE ENDPOINTS ==========
 
@@ -1021,55 +2496,21 @@ async def register_advocate(data: AdvocateRegister):
     # Check if advocate already exists
     existing = await db.advocates.find_one({"email": data.email}, {"_id": 0})
     if existing:
-        raise HTTPException(status_code=400, detail="Advocate already registered")
-    
-    # Generate FID
-    fid, fid_number = await generate_fid()
-    
-    # Create advocate
-    advocate_id = str(uuid.uuid4())
-    advocate = {
-        "id": advocate_id,
-        "fid": fid,
-        "fid_number": fid_number,
-        "email": data.email,
-        "role": "advocate",
-        "first_name": data.first_name,
-        "last_name": data.last_name,
-        "phone_number": data.phone_number,
-        "bar_council_id": data.bar_council_id,
-        "bar_council_issue_years": data.bar_council_issue_years,
-        "bar_council_issue_months": data.bar_council_issue_months,
-        "languages": data.languages,
-        "law_types": data.law_types,
-        "working_hours": data.working_hours,
-        "area": data.area,
-        "city": data.city,
-        "state": data.state,
-        "per_minute_charge": data.per_minute_charge,
-        "verification_status": "pending",
-        "duty_status": False,
-        "average_rating": 0.0,
-        "total_cases": 0,
-        "token": None,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "last_login": None
-    }
+        raise HTTPException(status_code=400, detail="Advocate already registered")
+    
+    # Generate FID
+    _, fid_number = await generate_fid()
     
+    # Create advocate
+    advocate = build_advocate_document(data, fid_number)
     await db.advocates.insert_one(advocate)
     
     # Create wallet for advocate
-    wallet = {
-        "user_id": advocate_id,
-        "balance": 0.0,
-        "currency": "INR",
-        "transactions": []
-    }
-    await db.wallets.insert_one(wallet)
+    await db.wallets.insert_one(build_wallet_document(advocate["id"]))
     
     return {
         "message": "Registration successful. Your Bar Council ID verification is in progress. This may take up to 24 hours.",
-        "fid": fid,
+        "fid": advocate["fid"],
         "verification_status": "pending"
     }
 
@@ -1078,29 +2519,7 @@ async def get_advocate_profile(current_user: dict = Depends(get_current_user)):
     """Get advocate profile"""
     await require_role(current_user, ["advocate"])
     
-    return AdvocateResponse(
-        id=current_user["id"],
-        fid=current_user["fid"],
-        email=current_user["email"],
-        first_name=current_user["first_name"],
-        last_name=current_user["last_name"],
-        phone_number=current_user["phone_number"],
-        bar_council_id=current_user["bar_council_id"],
-        bar_council_issue_years=current_user["bar_council_issue_years"],
-        bar_council_issue_months=current_user["bar_council_issue_months"],
-        languages=current_user["languages"],
-        law_types=current_user["law_types"],
-        working_hours=current_user["working_hours"],
-        area=current_user["area"],
-        city=current_user["city"],
-        state=current_user["state"],
-        per_minute_charge=current_user["per_minute_charge"],
-        verification_status=current_user["verification_status"],
-        duty_status=current_user["duty_status"],
-        average_rating=current_user["average_rating"],
-        total_cases=current_user["total_cases"],
-        created_at=datetime.fromisoformat(current_user["created_at"])
-    )
+    return build_advocate_response(current_user)
 
 @api_router.put("/advocate/profile")
 async def update_advocate_profile(data: AdvocateUpdate, current_user: dict = Depends(get_current_user)):
@@ -1108,12 +2527,19 @@ async def update_advocate_profile(data: AdvocateUpdate, current_user: dict = Dep
     await require_role(current_user, ["advocate"])
     
     update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+    if "city" in update_data:
+        update_data["location"] = geocode_city(update_data["city"])
+    if "working_hours" in update_data:
+        update_data["availability_mask"] = compile_working_hours(update_data["working_hours"])
     
     if update_data:
         await db.advocates.update_one(
             {"id": current_user["id"]},
             {"$set": update_data}
         )
+        advocate_search.invalidate()
+        if "per_minute_charge" in update_data:
+            await refresh_advocate_rank(current_user["id"])
     
     return {"message": "Profile updated successfully"}
 
@@ -1125,27 +2551,50 @@ async def update_duty_status(data: DutyStatusUpdate, current_user: dict = Depend
     if current_user["verification_status"] != "approved":
         raise HTTPException(status_code=403, detail="Cannot go online. Your account is not verified yet.")
     
+    update = {"duty_status": data.duty_status}
+    if data.duty_status:
+        # Going online counts as a heartbeat, so the reaper gives the app a full TTL to start beating
+        update["last_heartbeat_at"] = datetime.now(timezone.utc)
+        presence.beat(current_user["id"])
+    
     await db.advocates.update_one(
         {"id": current_user["id"]},
-        {"$set": {"duty_status": data.duty_status}}
+        {"$set": update}
     )
     
     status_text = "online" if data.duty_status else "offline"
     return {"message": f"Duty status updated to {status_text}"}
 
+@api_router.post("/advocate/heartbeat")
+async def advocate_heartbeat(current_user: dict = Depends(get_current_user)):
+    """
+    Presence heartbeat while on duty
+    
+    Send every `next_heartbeat_in` seconds. Advocates that stop sending are
+    taken off duty automatically; `duty_status: false` in the response means
+    that has already happened.
+    """
+    await require_role(current_user, ["advocate"])
+    
+    if not current_user.get("duty_status"):
+        return {"duty_status": False, "next_heartbeat_in": PRESENCE_HEARTBEAT_SECONDS}
+    
+    presence.beat(current_user["id"])
+    return {"duty_status": True, "next_heartbeat_in": PRESENCE_HEARTBEAT_SECONDS}
+
 @api_router.get("/advocate/dashboard")
 async def get_advocate_dashboard(current_user: dict = Depends(get_current_user)):
     """Get advocate dashboard stats"""
     await require_role(current_user, ["advocate"])
     
     # Get total earnings
-    calls = await db.calls.find(
-        {"advocate_id": current_user["id"], "status": "completed"},
-        {"_id": 0, "total_cost": 1}
-    ).to_list(1000)
+    totals = await db.calls.aggregate([
+        {"$match": {"advocate_id": current_user["id"], "status": "completed"}},
+        {"$group": {"_id": None, "total_earnings": {"$sum": {"$ifNull": ["$total_cost", 0]}}, "total_cases": {"$sum": 1}}}
+    ]).to_list(1)
     
-    total_earnings = sum([c.get("total_cost", 0) for c in calls])
-    total_cases = len(calls)
+    total_earnings = totals[0]["total_earnings"] if totals else 0
+    total_cases = totals[0]["total_cases"] if totals else 0
     
     # Get wallet
     wallet = await db.wallets.find_one({"user_id": current_user["id"]}, {"_id": 0})
@@ -1160,6 +2609,77 @@ async def get_advocate_dashboard(current_user: dict = Depends(get_current_user))
         "wallet_balance": wallet["balance"] if wallet else 0.0
     }
 
+@api_router.get("/advocate/earnings")
+async def get_advocate_earnings(
+    start: date,
+    end: date,
+    granularity: Literal["day", "month"] = "day",
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Earnings report for a date range
+    
+    - Per IST day or calendar month: completed calls, billed minutes, gross
+      billed, advocate earnings and platform fee
+    - Month granularity always covers whole months
+    - Periods that have ended are computed once and served from earnings_cache
+    """
+    await require_role(current_user, ["advocate"])
+    
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    periods = earnings_periods(start, end, granularity)
+    if len(periods) > EARNINGS_MAX_PERIODS:
+        raise HTTPException(status_code=400, detail=f"At most {EARNINGS_MAX_PERIODS} periods per report")
+    
+    advocate_id = current_user["id"]
+    now = datetime.now(timezone.utc)
+    cache_ids = {label: f"{advocate_id}|{granularity}|{label}" for label, _, _ in periods}
+    cached = {
+        doc["period"]: doc
+        async for doc in db.earnings_cache.find({"_id": {"$in": list(cache_ids.values())}})
+    }
+    
+    missing = [(label, period_start, period_end) for label, period_start, period_end in periods if label not in cached]
+    computed = {}
+    if missing:
+        computed = await aggregate_advocate_earnings(advocate_id, missing[0][1], missing[-1][2], granularity)
+        closed = [
+            UpdateOne(
+                {"_id": cache_ids[label]},
+                {"$set": {
+                    "advocate_id": advocate_id,
+                    "granularity": granularity,
+                    "period": label,
+                    **computed.get(label, dict.fromkeys(EARNINGS_METRICS, 0)),
+                    "cached_at": now
+                }},
+                upsert=True
+            )
+            for label, _, period_end in missing if period_end <= now
+        ]
+        if closed:
+            await db.earnings_cache.bulk_write(closed, ordered=False)
+    
+    rows = []
+    for label, _, _ in periods:
+        source = cached.get(label) or computed.get(label) or {}
+        rows.append({"period": label, **{metric: source.get(metric, 0) for metric in EARNINGS_METRICS}})
+    
+    totals = {metric: sum(row[metric] for row in rows) for metric in EARNINGS_METRICS}
+    for metric in ("gross", "earnings", "platform_fee"):
+        totals[metric] = round(totals[metric], 2)
+    
+    return {
+        "start": periods[0][1].date(),
+        "end": (periods[-1][2] - timedelta(days=1)).date(),
+        "granularity": granularity,
+        "timezone": "Asia/Kolkata",
+        "revenue_share": ADVOCATE_REVENUE_SHARE,
+        "periods": rows,
+        "totals": totals
+    }
+
 @api_router.get("/advocate/call-history", response_model=List[CallResponse])
 async def get_advocate_call_history(current_user: dict = Depends(get_current_user)):
     """Get advocate call history"""
@@ -1202,29 +2722,7 @@ async def get_pending_advocates(current_user: dict = Depends(get_current_user)):
     
     result = []
     for adv in advocates:
-        result.append(AdvocateResponse(
-            id=adv["id"],
-            fid=adv["fid"],
-            email=adv["email"],
-            first_name=adv["first_name"],
-            last_name=adv["last_name"],
-            phone_number=adv["phone_number"],
-            bar_council_id=adv["bar_council_id"],
-            bar_council_issue_years=adv["bar_council_issue_years"],
-            bar_council_issue_months=adv["bar_council_issue_months"],
-            languages=adv["languages"],
-            law_types=adv["law_types"],
-            working_hours=adv["working_hours"],
-            area=adv["area"],
-            city=adv["city"],
-            state=adv["state"],
-            per_minute_charge=adv["per_minute_charge"],
-            verification_status=adv["verification_status"],
-            duty_status=adv["duty_status"],
-            average_rating=adv["average_rating"],
-            total_cases=adv["total_cases"],
-            created_at=datetime.fromisoformat(adv["created_at"])
-        ))
+        result.append(build_advocate_response(adv))
     
     return result
 
@@ -1245,6 +2743,7 @@ async def verify_advocate(
         {"id": advocate_id},
         {"$set": {"verification_status": data.status}}
     )
+    advocate_search.invalidate()
     
     # Send email notification
     if data.status == "approved":
@@ -1255,6 +2754,90 @@ async def verify_advocate(
     
     return {"message": f"Advocate {data.status} successfully"}
 
+@api_router.post("/admin/advocates/bulk-verify")
+async def bulk_verify_advocates(
+    data: AdvocateBulkVerification,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Approve or reject many advocates at once
+    
+    - One find for all ids, one unordered bulk_write for all decisions
+    - Approval emails are sent as Resend batches after the response
+    - Returns a result per advocate id (last decision wins for repeated ids)
+    """
+    await require_role(current_user, ["admin"])
+    
+    decisions = {item.advocate_id: item for item in data.items}
+    
+    advocates = await db.advocates.find(
+        {"id": {"$in": list(decisions)}},
+        {"_id": 0, "id": 1, "email": 1, "first_name": 1, "last_name": 1, "verification_status": 1}
+    ).to_list(len(decisions))
+    found = {adv["id"]: adv for adv in advocates}
+    
+    results = {}
+    operations = []
+    operation_ids = []
+    for advocate_id, item in decisions.items():
+        if advocate_id not in found:
+            results[advocate_id] = {"advocate_id": advocate_id, "status": "not_found"}
+            continue
+        operations.append(UpdateOne({"id": advocate_id}, {"$set": {"verification_status": item.status}}))
+        operation_ids.append(advocate_id)
+        results[advocate_id] = {"advocate_id": advocate_id, "status": item.status}
+    
+    if operations:
+        try:
+            await db.advocates.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                advocate_id = operation_ids[error["index"]]
+                results[advocate_id] = {"advocate_id": advocate_id, "status": "error", "error": error.get("errmsg")}
+    
+    # Only newly approved advocates get an email
+    approvals = [
+        (found[advocate_id]["email"], f"{found[advocate_id]['first_name']} {found[advocate_id]['last_name']}")
+        for advocate_id, result in results.items()
+        if result["status"] == "approved" and found[advocate_id].get("verification_status") != "approved"
+    ]
+    if approvals:
+        background_tasks.add_task(send_approval_emails_batch, approvals)
+    if operations:
+        advocate_search.invalidate()
+    
+    updated = sum(1 for r in results.values() if r["status"] in ("approved", "rejected"))
+    return {
+        "message": f"{updated} of {len(decisions)} advocates updated",
+        "updated": updated,
+        "emails_queued": len(approvals),
+        "results": list(results.values())
+    }
+
+@api_router.post("/admin/advocates/import")
+async def import_advocate_roster(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Bulk-register advocates from a partner roster
+    
+    Request body is the raw CSV (with header row) or NDJSON file. Imported
+    advocates start as pending verification, same as self-registration.
+    """
+    await require_role(current_user, ["admin"])
+    
+    content = (await request.body()).decode("utf-8-sig")
+    rows = parse_advocate_roster(content, format)
+    if len(rows) > IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Roster too large. Maximum {IMPORT_MAX_ROWS} rows per import")
+    
+    result = await import_advocates(rows)
+    logger.info(f"Advocate import by {current_user['email']}: {result['imported']} imported, {result['failed']} failed")
+    return result
+
 @api_router.get("/admin/advocates", response_model=List[AdvocateResponse])
 async def get_all_advocates(current_user: dict = Depends(get_current_user)):
     """Get all advocates"""
@@ -1264,29 +2847,7 @@ async def get_all_advocates(current_user: dict = Depends(get_current_user)):
     
     result = []
     for adv in advocates:
-        result.append(AdvocateResponse(
-            id=adv["id"],
-            fid=adv["fid"],
-            email=adv["email"],
-            first_name=adv["first_name"],
-            last_name=adv["last_name"],
-            phone_number=adv["phone_number"],
-            bar_council_id=adv["bar_council_id"],
-            bar_council_issue_years=adv["bar_council_issue_years"],
-            bar_council_issue_months=adv["bar_council_issue_months"],
-            languages=adv["languages"],
-            law_types=adv["law_types"],
-            working_hours=adv["working_hours"],
-            area=adv["area"],
-            city=adv["city"],
-            state=adv["state"],
-            per_minute_charge=adv["per_minute_charge"],
-            verification_status=adv["verification_status"],
-            duty_status=adv["duty_status"],
-            average_rating=adv["average_rating"],
-            total_cases=adv["total_cases"],
-            created_at=datetime.fromisoformat(adv["created_at"])
-        ))
+        result.append(build_advocate_response(adv))
     
     return result
 
@@ -1310,6 +2871,93 @@ async def get_all_users(current_user: dict = Depends(get_current_user)):
     
     return result
 
+def encode_cursor(values: list) -> str:
+    """Opaque keyset cursor for the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+@api_router.get("/admin/users/search", response_model=List[UserResponse])
+async def search_users(
+    response: Response,
+    email_prefix: Optional[str] = Query(None, min_length=1, max_length=254),
+    city: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    last_login_from: Optional[datetime] = None,
+    last_login_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_USER_SEARCH_PAGE),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Search client users with server-side filters and keyset paging
+    
+    - email_prefix (case-sensitive) walks the email index in email order;
+      otherwise users are newest first
+    - Date ranges are [from, to)
+    - Pass the X-Next-Cursor header value as `cursor` to get the next page
+    - X-Total-Estimate is the approximate size of the whole collection
+      (collection metadata, not a count of matches)
+    """
+    await require_role(current_user, ["admin"])
+    
+    filters = []
+    if email_prefix:
+        filters.append({"email": {"$regex": f"^{re.escape(email_prefix)}"}})
+    if city:
+        filters.append({"city": city})
+    for field, start, end in (("created_at", created_from, created_to), ("last_login", last_login_from, last_login_to)):
+        date_filter = date_range_filter(field, start, end)
+        if date_filter:
+            filters.append(date_filter)
+    
+    if email_prefix:
+        sort = [("email", 1)]
+        if cursor:
+            filters.append({"email": {"$gt": decode_cursor(cursor)[0]}})
+    else:
+        sort = [("created_at", -1), ("id", -1)]
+        if cursor:
+            created_at, user_id = decode_cursor(cursor)
+            filters.append({"$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "id": {"$lt": user_id}}
+            ]})
+    
+    query = {"$and": filters} if filters else {}
+    users = await db.users.find(
+        query, {"_id": 0, "id": 1, "email": 1, "role": 1, "name": 1, "city": 1, "created_at": 1, "last_login": 1}
+    ).sort(sort).limit(limit + 1).to_list(limit + 1)
+    
+    if len(users) > limit:
+        users = users[:limit]
+        last = users[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            [last["email"], last["id"]] if email_prefix else [last["created_at"], last["id"]]
+        )
+    response.headers["X-Total-Estimate"] = str(await db.users.estimated_document_count())
+    
+    return [
+        UserResponse(
+            id=user["id"],
+            email=user["email"],
+            role=user["role"],
+            name=user.get("name"),
+            city=user.get("city"),
+            created_at=parse_timestamp(user["created_at"]),
+            last_login=parse_timestamp(user["last_login"]) if user.get("last_login") else None
+        )
+        for user in users
+    ]
+
 @api_router.get("/admin/calls", response_model=List[CallResponse])
 async def get_all_calls(current_user: dict = Depends(get_current_user)):
     """Get all call logs"""
@@ -1335,6 +2983,120 @@ async def get_all_calls(current_user: dict = Depends(get_current_user)):
     
     return result
 
+@api_router.get("/admin/calls/{call_id}/events")
+async def get_call_events(call_id: str, current_user: dict = Depends(get_current_user)):
+    """Get a call's event log, oldest first"""
+    await require_role(current_user, ["admin"])
+    
+    await call_events.flush()
+    events = await db.call_events.find({"call_id": call_id}, {"_id": 0}).sort("created_at", 1).to_list(None)
+    if not events:
+        raise HTTPException(status_code=404, detail="No events recorded for this call")
+    
+    return {"call_id": call_id, "events": events}
+
+@api_router.post("/admin/calls/{call_id}/replay")
+async def replay_call(call_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Rebuild a call's status fields from its event log
+    
+    - Replays the same state machine as live webhooks
+    - Wallet charges and advocate stats are not re-applied
+    """
+    await require_role(current_user, ["admin"])
+    
+    if not await db.calls.find_one({"id": call_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Call not found")
+    
+    events, projection = await replay_call_events(call_id)
+    
+    logger.info(f"Call {call_id} replayed from {len(events)} events by admin {current_user['id']}")
+    return {"call_id": call_id, "events_replayed": len(events), "projection": projection}
+
+@api_router.get("/admin/webhooks/dead-letter")
+async def get_dead_letter_webhooks(
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user)
+):
+    """List webhook deliveries that failed every attempt"""
+    await require_role(current_user, ["admin"])
+    
+    items = await db.webhook_inbox.find(
+        {"status": "dead_letter"}, {"_id": 0}
+    ).sort("received_at", -1).to_list(limit)
+    
+    return {"items": items}
+
+@api_router.post("/admin/webhooks/{webhook_id}/retry")
+async def retry_dead_letter_webhook(webhook_id: str, current_user: dict = Depends(get_current_user)):
+    """Put a dead-lettered webhook delivery back on the inbox queue"""
+    await require_role(current_user, ["admin"])
+    
+    result = await db.webhook_inbox.update_one(
+        {"id": webhook_id, "status": "dead_letter"},
+        {"$set": {"status": "pending", "attempts": 0, "next_attempt_at": datetime.now(timezone.utc)}}
+    )
+    if not result.matched_count:
+        raise HTTPException(status_code=404, detail="Dead-lettered webhook not found")
+    
+    webhook_inbox_wakeup.set()
+    logger.info(f"Webhook {webhook_id} requeued by admin {current_user['id']}")
+    return {"message": "Webhook requeued"}
+
+@api_router.get("/admin/export/{dataset}")
+async def export_dataset(
+    dataset: Literal["calls", "users", "advocates"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream a full export of calls, users or advocates
+    
+    - start/end filter on created_at ([start, end))
+    - status filters calls by status and advocates by verification_status
+    - Rows are read from a cursor in batches and written as they arrive, so
+      memory stays flat regardless of export size
+    """
+    await require_role(current_user, ["admin"])
+    
+    spec = EXPORT_DATASETS[dataset]
+    fields = spec["fields"]
+    
+    query = date_range_filter("created_at", start, end)
+    if status:
+        if not spec["status_field"]:
+            raise HTTPException(status_code=400, detail=f"{dataset} export does not support a status filter")
+        query[spec["status_field"]] = status
+    
+    projection = {"_id": 0, **{f: 1 for f in fields}}
+    
+    async def generate_rows():
+        cursor = db[dataset].find(query, projection).sort("created_at", 1).batch_size(EXPORT_BATCH_SIZE)
+        try:
+            if format == "csv":
+                yield format_export_rows([{f: f for f in fields}], fields, "csv")
+            batch = []
+            async for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= EXPORT_ROWS_PER_CHUNK:
+                    yield format_export_rows(batch, fields, format)
+                    batch = []
+            if batch:
+                yield format_export_rows(batch, fields, format)
+        finally:
+            await cursor.close()
+    
+    filename = f"{dataset}-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}.{format}"
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        generate_rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @api_router.get("/admin/analytics", response_model=AdminStats)
 async def get_admin_analytics(current_user: dict = Depends(get_current_user)):
     """Get platform analytics"""
@@ -1357,22 +3119,188 @@ async def get_admin_analytics(current_user: dict = Depends(get_current_user)):
         total_revenue=total_revenue
     )
 
+@api_router.get("/admin/analytics/timeseries")
+async def get_analytics_timeseries(
+    start: date,
+    end: date,
+    granularity: Literal["day", "hour"] = "day",
+    group_by: Literal["total", "city", "law_type", "advocate"] = "total",
+    city: Optional[str] = None,
+    law_type: Optional[str] = None,
+    advocate_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Calls, billed minutes and revenue over time
+    
+    - start/end are IST days, both inclusive; calls are bucketed by the time they ended
+    - Reads only the rollup buckets in range (one per day x city x law type, or per day x advocate)
+    - Buckets without calls are omitted from the series
+    """
+    await require_role(current_user, ["admin"])
+    
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    max_days = ANALYTICS_MAX_HOURLY_DAYS if granularity == "hour" else ANALYTICS_MAX_DAYS
+    if (end - start).days + 1 > max_days:
+        raise HTTPException(status_code=400, detail=f"{granularity} series are limited to {max_days} days")
+    
+    by_advocate = group_by == "advocate" or advocate_id is not None
+    if by_advocate and (city or law_type or group_by in ("city", "law_type")):
+        raise HTTPException(status_code=400, detail="Advocate series cannot be split or filtered by city or law type")
+    
+    query = {"day": {"$gte": start.isoformat(), "$lte": end.isoformat()}}
+    if by_advocate:
+        collection, group_field = db.advocate_rollups, "advocate_id"
+        if advocate_id:
+            query["advocate_id"] = advocate_id
+    else:
+        collection, group_field = db.call_rollups, group_by
+        if city:
+            query["city"] = city
+        if law_type:
+            query["law_type"] = law_type
+    
+    projection = {"_id": 0, "day": 1, group_field: 1}
+    projection.update({"hours": 1} if granularity == "hour" else {metric: 1 for metric in ROLLUP_METRICS})
+    
+    series = {}
+    async for bucket in collection.find(query, projection):
+        key = "total" if group_by == "total" else bucket.get(group_field)
+        points = series.setdefault(key, {})
+        if granularity == "day":
+            entries = [(bucket["day"], bucket)]
+        else:
+            entries = [(f"{bucket['day']}T{hour}", values) for hour, values in (bucket.get("hours") or {}).items()]
+        for label, values in entries:
+            point = points.setdefault(label, dict.fromkeys(ROLLUP_METRICS, 0))
+            for metric in ROLLUP_METRICS:
+                point[metric] += values.get(metric, 0)
+    
+    return {
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "group_by": group_by,
+        "timezone": "Asia/Kolkata",
+        "series": [
+            {
+                "key": key,
+                "points": [
+                    {"bucket": label, **point, "revenue": round(point["revenue"], 2)}
+                    for label, point in sorted(points.items())
+                ]
+            }
+            for key, points in sorted(series.items())
+        ]
+    }
+
+@api_router.get("/admin/metrics")
+async def get_admin_metrics(current_user: dict = Depends(get_current_user)):
+    """In-process runtime counters for this server process"""
+    await require_role(current_user, ["admin"])
+    
+    return {
+        "single_flight": {name: flight.snapshot() for name, flight in single_flights.items()},
+        "compression": dict(COMPRESSION_STATS),
+        "mongo_pool": mongo_pool.snapshot(),
+        "providers": {name: breaker.snapshot() for name, breaker in provider_breakers.items()},
+        "otp_channels": {
+            channel: {**stats, "latency_ms": round(stats["latency_ms"], 1)} for channel, stats in OTP_CHANNEL_STATS.items()
+        }
+    }
+
 # ========== WEBHOOK ENDPOINTS ==========
 
+# Receivers only store the delivery in the webhook inbox and acknowledge it;
+# the process_* handlers run on the inbox workers (see BACKGROUND JOBS)
+
 @api_router.post("/webhooks/twilio/call-status")
 async def twilio_call_status(request: dict):
     """Handle Twilio call status webhooks"""
-    # TODO: Implement Twilio webhook handling
-    logger.info(f"[PLACEHOLDER] Twilio webhook received: {request}")
+    dedupe_key = webhook_dedupe_key("twilio", request.get("CallSid"), request.get("CallStatus"), payload=request)
+    await receive_webhook("twilio_call_status", dedupe_key, request)
     return {"message": "Webhook received"}
 
+async def process_twilio_call_status(data: dict):
+    # TODO: Implement Twilio webhook handling
+    logger.info(f"[PLACEHOLDER] Twilio webhook received: {data}")
+
 @api_router.post("/webhooks/razorpay")
-async def razorpay_webhook(request: dict):
+async def razorpay_webhook(request: dict, x_razorpay_event_id: Optional[str] = Header(None)):
     """Handle Razorpay payment webhooks"""
-    # TODO: Implement Razorpay webhook handling
-    logger.info(f"[PLACEHOLDER] Razorpay webhook received: {request}")
+    dedupe_key = webhook_dedupe_key("razorpay", x_razorpay_event_id, payload=request)
+    await receive_webhook("razorpay", dedupe_key, request)
     return {"message": "Webhook received"}
 
+async def process_razorpay_event(data: dict):
+    # TODO: Implement Razorpay webhook handling
+    logger.info(f"[PLACEHOLDER] Razorpay webhook received: {data}")
+
+# ========== MSG91 OTP SESSIONS ==========
+
+class MSG91SessionStore:
+    """
+    MSG91 OTP sessions in `msg91_otps`, keyed by request_id and normalized mobile
+    
+    - Sessions expire through the TTL index on created_at (migrate.py)
+    - Verify attempts are counted with one conditional $inc against the
+      mobile's latest pending session, so concurrent guesses cannot exceed
+      MSG91_MAX_VERIFY_ATTEMPTS
+    - The latest session is always resolved in Mongo, since a newer send-otp
+      may have been served by another replica
+    """
+    
+    def __init__(self, ttl_seconds: int, max_attempts: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_attempts = max_attempts
+    
+    async def create(self, request_id: Optional[str], mobile: str, email: Optional[str]):
+        request_id = request_id or str(uuid.uuid4())  # MSG91 normally returns one
+        await db.msg91_otps.insert_one({
+            "request_id": request_id,
+            "mobile": mobile,
+            "email": email,
+            "created_at": datetime.now(timezone.utc),
+            "verified": False,
+            "attempts": 0
+        })
+    
+    async def current_request_id(self, mobile: str):
+        """request_id of the mobile's latest pending session, or None"""
+        latest = await db.msg91_otps.find_one(
+            {
+                "mobile": mobile,
+                "verified": False,
+                "created_at": {"$gt": datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)}
+            },
+            {"_id": 0, "request_id": 1},
+            sort=[("created_at", -1)]
+        )
+        return latest["request_id"] if latest else None
+    
+    async def claim_attempt(self, mobile: str) -> str:
+        """Count a verify attempt against the mobile's pending session; returns its request_id"""
+        request_id = await self.current_request_id(mobile)
+        if request_id is None:
+            raise HTTPException(status_code=400, detail="No pending OTP for this number. Please request a new one.")
+        claimed = await db.msg91_otps.find_one_and_update(
+            {"request_id": request_id, "verified": False, "attempts": {"$not": {"$gte": self.max_attempts}}},
+            {"$inc": {"attempts": 1}},
+            projection={"_id": 0, "request_id": 1}
+        )
+        if not claimed:
+            raise HTTPException(status_code=429, detail="Too many attempts. Please request a new OTP.")
+        return request_id
+    
+    async def mark_verified(self, request_id: str):
+        await db.msg91_otps.update_one(
+            {"request_id": request_id},
+            {"$set": {"verified": True, "verified_at": datetime.now(timezone.utc)}}
+        )
+
+msg91_sessions = MSG91SessionStore(MSG91_SESSION_TTL_SECONDS, MSG91_MAX_VERIFY_ATTEMPTS)
+
 # ========== MSG91 OTP ENDPOINTS ==========
 
 @api_router.post("/msg91/send-otp")
@@ -1386,14 +3314,7 @@ async def msg91_send_otp_endpoint(data: MSG91SendOTP):
     result = await msg91_send_otp(data.mobile, data.email)
     
     if result["success"]:
-        # Store in database for tracking
-        await db.msg91_otps.insert_one({
-            "request_id": result.get("request_id"),
-            "mobile": result.get("mobile"),
-            "email": data.email,
-            "created_at": datetime.now(timezone.utc),
-            "verified": False
-        })
+        await msg91_sessions.create(result.get("request_id"), result["mobile"], data.email)
         return result
     else:
         raise HTTPException(status_code=400, detail=result["message"])
@@ -1405,19 +3326,14 @@ async def msg91_verify_otp_endpoint(data: MSG91VerifyOTP):
     
     mobile: Phone number
     otp: OTP entered by user
+    
+    Each call counts against the session's MSG91_MAX_VERIFY_ATTEMPTS.
     """
+    request_id = await msg91_sessions.claim_attempt(normalize_mobile(data.mobile))
     result = await msg91_verify_otp(data.mobile, data.otp)
     
     if result["success"]:
-        # Mark as verified in database
-        mobile_clean = data.mobile.replace("+", "").replace(" ", "")
-        if not mobile_clean.startswith("91"):
-            mobile_clean = "91" + mobile_clean.lstrip("0")
-            
-        await db.msg91_otps.update_one(
-            {"mobile": mobile_clean, "verified": False},
-            {"$set": {"verified": True, "verified_at": datetime.now(timezone.utc)}}
-        )
+        await msg91_sessions.mark_verified(request_id)
         return result
     else:
         raise HTTPException(status_code=400, detail=result["message"])
@@ -1443,23 +3359,22 @@ async def msg91_otp_webhook(request: Request):
     """
     try:
         data = await request.json()
-        logger.info(f"MSG91 OTP webhook received: {data}")
-        
-        req_id = data.get("reqId")
-        status = data.get("status")
-        identifier = data.get("identifier")
-        
-        if status == "verified":
-            # Update in database
-            await db.msg91_otps.update_one(
-                {"req_id": req_id},
-                {"$set": {"verified": True, "verified_at": datetime.now(timezone.utc)}}
-            )
-        
-        return {"message": "Webhook processed"}
-    except Exception as e:
-        logger.error(f"MSG91 webhook error: {str(e)}")
+    except ValueError:
+        logger.error("MSG91 webhook error: body is not JSON")
         return {"message": "Error processing webhook"}
+    
+    logger.info(f"MSG91 OTP webhook received: {data}")
+    dedupe_key = webhook_dedupe_key("msg91", data.get("reqId"), data.get("status"), payload=data)
+    await receive_webhook("msg91_otp", dedupe_key, data)
+    return {"message": "Webhook received"}
+
+async def process_msg91_otp_event(data: dict):
+    """Apply an MSG91 OTP webhook delivery"""
+    request_id = data.get("reqId") or data.get("request_id")
+    status = data.get("status")
+    
+    if status == "verified" and request_id:
+        await msg91_sessions.mark_verified(request_id)
 
 # ========== EXOTEL CALL ENDPOINTS ==========
 
@@ -1503,8 +3418,12 @@ async def exotel_initiate_call_endpoint(
             detail=f"Insufficient wallet balance. Minimum ₹{min_balance} required for call"
         )
     
-    # Create call record
+    # Claim the advocate so concurrent clients cannot ring them at the same time
     call_id = str(uuid.uuid4())
+    if not await claim_advocate_for_call(data.advocate_id, call_id):
+        raise HTTPException(status_code=409, detail="Advocate is on another call. Please try again shortly.")
+    
+    # Create call record
     call_record = {
         "id": call_id,
         "client_id": current_user["id"],
@@ -1512,10 +3431,13 @@ async def exotel_initiate_call_endpoint(
         "advocate_id": data.advocate_id,
         "advocate_phone": advocate.get("phone_number"),
         "cost_per_minute": advocate.get("per_minute_charge", PER_MINUTE_RATE),
-        "status": "initiating",
+        **call_dimensions(advocate, data.law_type),
         "created_at": datetime.now(timezone.utc)
     }
     
+    event = new_call_event(call_id, "initiating", "api")
+    call_record.update(transition_fields(event))
+    await call_events.write(event)
     await db.calls.insert_one(call_record)
     
     # Initiate call via Exotel
@@ -1526,13 +3448,10 @@ async def exotel_initiate_call_endpoint(
     )
     
     if result["success"]:
-        # Update call record with Exotel SID
-        await db.calls.update_one(
-            {"id": call_id},
-            {"$set": {
-                "exotel_call_sid": result["exotel_call_sid"],
-                "status": "ringing"
-            }}
+        # Record the Exotel SID (a no-op if a status webhook already moved the call on)
+        await record_call_event(
+            call_id, "ringing", "exotel_api",
+            fields={"exotel_call_sid": result["exotel_call_sid"]}
         )
         
         return {
@@ -1542,11 +3461,9 @@ async def exotel_initiate_call_endpoint(
             "message": "Call initiated. Connecting..."
         }
     else:
-        # Update call record as failed
-        await db.calls.update_one(
-            {"id": call_id},
-            {"$set": {"status": "failed", "error": result["message"]}}
-        )
+        # Mark call as failed
+        await record_call_event(call_id, "failed", "exotel_api", fields={"error": result["message"]})
+        await release_advocate_from_call(data.advocate_id, call_id)
         raise HTTPException(status_code=500, detail=result["message"])
 
 @api_router.post("/webhooks/exotel/status")
@@ -1557,93 +3474,111 @@ async def exotel_status_webhook(request: Request):
     Configure this URL in Exotel dashboard as StatusCallback:
     {BACKEND_URL}/api/webhooks/exotel/status
     
-    Handles call completion and wallet deduction
+    Handles call completion and wallet deduction. The delivery is stored in
+    the webhook inbox and acknowledged straight away; process_exotel_status
+    applies it on an inbox worker.
     """
-    try:
-        # Parse form data from Exotel
-        form_data = await request.form()
-        data = dict(form_data)
-        
-        logger.info(f"Exotel status webhook received: {data}")
-        
-        call_sid = data.get("CallSid")
-        status = data.get("Status")
-        duration = data.get("RecordingDuration") or data.get("Duration") or data.get("ConversationDuration")
-        custom_field = data.get("CustomField")  # Our call_id
-        
-        if not custom_field:
-            # Try to find call by exotel_call_sid
-            call = await db.calls.find_one({"exotel_call_sid": call_sid}, {"_id": 0})
-            if call:
-                custom_field = call.get("id")
+    form_data = await request.form()
+    data = dict(form_data)
+    
+    logger.info(f"Exotel status webhook received: {data}")
+    
+    dedupe_key = webhook_dedupe_key(
+        "exotel", data.get("CallSid") or data.get("CustomField"), data.get("Status"), payload=data
+    )
+    await receive_webhook("exotel_status", dedupe_key, data)
+    return {"message": "Webhook received"}
+
+async def process_exotel_status(data: dict):
+    """Apply an Exotel status callback: project the call state, then bill and release the advocate"""
+    call_sid = data.get("CallSid")
+    status = data.get("Status")
+    duration = data.get("RecordingDuration") or data.get("Duration") or data.get("ConversationDuration")
+    custom_field = data.get("CustomField")  # Our call_id
+    
+    if not custom_field:
+        # Try to find call by exotel_call_sid
+        call = await db.calls.find_one({"exotel_call_sid": call_sid}, {"_id": 0})
+        if call:
+            custom_field = call.get("id")
+    
+    if custom_field:
+        call = await db.calls.find_one({"id": custom_field}, {"_id": 0})
         
-        if custom_field:
-            call = await db.calls.find_one({"id": custom_field}, {"_id": 0})
+        if call and is_terminal(status):
+            duration_seconds = int(duration or 0)
+            duration_minutes = duration_seconds / 60 if duration_seconds > 0 else 0
             
-            if call and status in ["completed", "busy", "no-answer", "failed", "canceled"]:
-                duration_seconds = int(duration or 0)
-                duration_minutes = duration_seconds / 60 if duration_seconds > 0 else 0
-                
-                # Round up to next minute for billing
-                billed_minutes = -(-duration_seconds // 60) if duration_seconds > 0 else 0
-                
-                total_cost = billed_minutes * call.get("cost_per_minute", PER_MINUTE_RATE)
+            # Round up to next minute for billing
+            billed_minutes = -(-duration_seconds // 60) if duration_seconds > 0 else 0
+            
+            total_cost = billed_minutes * call.get("cost_per_minute", PER_MINUTE_RATE)
+            advocate_share = total_cost * ADVOCATE_REVENUE_SHARE if status == "completed" else 0
+            ended_at = datetime.now(timezone.utc)
+            
+            # Only the first terminal status moves the call
+            applied = await record_call_event(
+                custom_field, status, "exotel_status",
+                fields={
+                    "end_time": ended_at,
+                    "duration_seconds": duration_seconds,
+                    "duration_minutes": round(duration_minutes, 2),
+                    "billed_minutes": billed_minutes,
+                    "total_cost": total_cost,
+                    "advocate_earning": advocate_share,
+                    "exotel_status": status
+                },
+                payload=data
+            )
+            if not applied:
+                # An inbox retry of a delivery that moved the call but failed before settling
+                # carries on; anything else is a duplicate or out-of-order status
+                current = await db.calls.find_one(
+                    {"id": custom_field}, {"_id": 0, "status": 1, "settled_at": 1, "end_time": 1}
+                )
+                if current.get("status") != status or current.get("settled_at"):
+                    return
+                ended_at = current.get("end_time") or ended_at
+            
+            # Wallet updates go through the call ledger so a retried delivery cannot apply them twice
+            # Deduct from client wallet if call completed
+            if status == "completed" and total_cost > 0:
+                await apply_call_wallet_entry(call["client_id"], {
+                    "type": "call_charge",
+                    "amount": -total_cost,
+                    "call_id": custom_field,
+                    "reference": f"Call {custom_field} - {billed_minutes} mins",
+                    "timestamp": datetime.now(timezone.utc)
+                })
                 
-                # Update call record
-                await db.calls.update_one(
-                    {"id": custom_field},
-                    {"$set": {
-                        "status": "completed" if status == "completed" else status,
-                        "end_time": datetime.now(timezone.utc),
-                        "duration_seconds": duration_seconds,
-                        "duration_minutes": round(duration_minutes, 2),
-                        "billed_minutes": billed_minutes,
-                        "total_cost": total_cost,
-                        "exotel_status": status
-                    }}
+                # Add to advocate earnings
+                advocate_wallet = build_wallet_document(call["advocate_id"])
+                del advocate_wallet["user_id"]
+                await db.wallets.update_one(
+                    {"user_id": call["advocate_id"]},
+                    {"$setOnInsert": advocate_wallet},
+                    upsert=True
                 )
+                await apply_call_wallet_entry(call["advocate_id"], {
+                    "type": "call_earning",
+                    "amount": advocate_share,
+                    "call_id": custom_field,
+                    "reference": f"Call {custom_field} - {billed_minutes} mins",
+                    "timestamp": datetime.now(timezone.utc)
+                })
                 
-                # Deduct from client wallet if call completed
-                if status == "completed" and total_cost > 0:
-                    await db.wallets.update_one(
-                        {"user_id": call["client_id"]},
-                        {
-                            "$inc": {"balance": -total_cost},
-                            "$push": {
-                                "transactions": {
-                                    "type": "call_charge",
-                                    "amount": -total_cost,
-                                    "reference": f"Call {custom_field} - {billed_minutes} mins",
-                                    "timestamp": datetime.now(timezone.utc)
-                                }
-                            }
-                        }
-                    )
-                    
-                    # Add to advocate earnings
-                    advocate_share = total_cost * 0.8  # 80% to advocate
-                    await db.wallets.update_one(
-                        {"user_id": call["advocate_id"]},
-                        {
-                            "$inc": {"balance": advocate_share},
-                            "$push": {
-                                "transactions": {
-                                    "type": "call_earning",
-                                    "amount": advocate_share,
-                                    "reference": f"Call {custom_field} - {billed_minutes} mins",
-                                    "timestamp": datetime.now(timezone.utc)
-                                }
-                            }
-                        },
-                        upsert=True
-                    )
-                    
-                    logger.info(f"Call {custom_field} completed. Duration: {billed_minutes} mins, Cost: ₹{total_cost}")
-        
-        return {"message": "Webhook processed"}
-    except Exception as e:
-        logger.error(f"Exotel webhook error: {str(e)}")
-        return {"message": "Error processing webhook"}
+                logger.info(f"Call {custom_field} completed. Duration: {billed_minutes} mins, Cost: ₹{total_cost}")
+            
+            await release_advocate_from_call(call["advocate_id"], custom_field)
+            
+            if status in RANK_CALL_OUTCOME_STATUSES:
+                await record_advocate_call_outcome(call["advocate_id"], status == "completed")
+            
+            await record_call_rollups(call, status, billed_minutes, total_cost, ended_at)
+            
+            await db.calls.update_one({"id": custom_field}, {"$set": {"settled_at": datetime.now(timezone.utc)}})
+        elif call and status:
+            await record_call_event(custom_field, status, "exotel_status", fields={"exotel_status": status}, payload=data)
 
 @api_router.get("/webhooks/exotel/passthru")
 async def exotel_passthru_webhook(request: Request):
@@ -1686,13 +3621,10 @@ async def exotel_passthru_webhook(request: Request):
             # Clean advocate phone for Exotel
             advocate_clean = advocate_phone.replace("+91", "").replace(" ", "").lstrip("0")
             
-            # Update call with Exotel SID
-            await db.calls.update_one(
-                {"id": pending_call["id"]},
-                {"$set": {
-                    "exotel_call_sid": call_sid,
-                    "status": "connecting"
-                }}
+            # Record the Exotel SID
+            await record_call_event(
+                pending_call["id"], "connecting", "exotel_passthru",
+                fields={"exotel_call_sid": call_sid}, payload=params
             )
             
             logger.info(f"Passthru: Routing {caller_clean} to advocate {advocate_clean}")
@@ -1711,48 +3643,350 @@ async def exotel_passthru_webhook(request: Request):
 @api_router.get("/utils/cities")
 async def get_cities():
     """Get list of major Indian cities"""
-    cities = [
-        "Mumbai", "Delhi", "Bangalore", "Hyderabad", "Ahmedabad", "Chennai",
-        "Kolkata", "Pune", "Jaipur", "Surat", "Lucknow", "Kanpur", "Nagpur",
-        "Indore", "Thane", "Bhopal", "Visakhapatnam", "Pimpri-Chinchwad",
-        "Patna", "Vadodara", "Ghaziabad", "Ludhiana", "Agra", "Nashik",
-        "Faridabad", "Meerut", "Rajkot", "Kalyan-Dombivali", "Vasai-Virar",
-        "Varanasi", "Srinagar", "Aurangabad", "Dhanbad", "Amritsar", "Navi Mumbai",
-        "Allahabad", "Ranchi", "Howrah", "Coimbatore", "Jabalpur", "Gwalior",
-        "Vijayawada", "Jodhpur", "Madurai", "Raipur", "Kota"
-    ]
-    return {"cities": sorted(cities)}
+    async def load():
+        cities = list(CITY_COORDINATES)
+        return json.dumps({"cities": sorted(cities)}).encode()
+    return json_bytes_response(await reference_data.do("cities", load))
 
 @api_router.get("/utils/law-types")
 async def get_law_types():
     """Get list of law types"""
-    law_types = [
-        "Family Law",
-        "Criminal Law",
-        "Civil Law",
-        "Corporate Law",
-        "Property Law",
-        "Labour Law",
-        "Tax Law",
-        "Intellectual Property Law",
-        "Consumer Protection Law",
-        "Banking & Finance Law",
-        "Immigration Law",
-        "Environmental Law",
-        "Constitutional Law",
-        "Cyber Law",
-        "International Law"
-    ]
-    return {"law_types": law_types}
+    async def load():
+        law_types = [
+            "Family Law",
+            "Criminal Law",
+            "Civil Law",
+            "Corporate Law",
+            "Property Law",
+            "Labour Law",
+            "Tax Law",
+            "Intellectual Property Law",
+            "Consumer Protection Law",
+            "Banking & Finance Law",
+            "Immigration Law",
+            "Environmental Law",
+            "Constitutional Law",
+            "Cyber Law",
+            "International Law"
+        ]
+        return json.dumps({"law_types": law_types}).encode()
+    return json_bytes_response(await reference_data.do("law_types", load))
 
 @api_router.get("/utils/languages")
 async def get_languages():
     """Get list of languages"""
-    languages = [
-        "Hindi", "English", "Tamil", "Telugu", "Marathi", "Bengali", "Gujarati",
-        "Kannada", "Malayalam", "Punjabi", "Urdu", "Odia", "Assamese"
-    ]
-    return {"languages": sorted(languages)}
+    async def load():
+        languages = [
+            "Hindi", "English", "Tamil", "Telugu", "Marathi", "Bengali", "Gujarati",
+            "Kannada", "Malayalam", "Punjabi", "Urdu", "Odia", "Assamese"
+        ]
+        return json.dumps({"languages": sorted(languages)}).encode()
+    return json_bytes_response(await reference_data.do("languages", load))
+
+# ========== BACKGROUND JOBS ==========
+
+_background_tasks = set()
+_cancel_on_shutdown = set()  # Loops and best-effort work that is cancelled rather than drained
+
+def spawn_background(coro, name: Optional[str] = None, cancel_on_shutdown: bool = False):
+    """
+    Run a coroutine in the background, keeping a reference until it finishes
+    
+    On shutdown background tasks are awaited (up to SHUTDOWN_DRAIN_SECONDS);
+    pass cancel_on_shutdown for endless loops and work that may be dropped.
+    """
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    if cancel_on_shutdown:
+        _cancel_on_shutdown.add(task)
+        task.add_done_callback(_cancel_on_shutdown.discard)
+    return task
+
+async def run_periodically(name: str, interval: float, job):
+    """Run `job` every `interval` seconds until shutdown; failures are logged and the loop continues"""
+    while not await lifecycle.sleep(interval):
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Background job {name} failed: {str(e)}")
+
+async def sweep_off_hours_advocates():
+    """Take advocates off duty when the current IST hour is outside their declared working hours"""
+    result = await db.advocates.update_many(
+        {"duty_status": True, "availability_mask": {"$bitsAllClear": [hour_of_week()]}},
+        {"$set": {"duty_status": False, "duty_off_reason": "outside_working_hours"}}
+    )
+    if result.modified_count:
+        logger.info(f"Availability sweep: {result.modified_count} advocates taken off duty")
+
+async def flush_presence():
+    flushed = await presence.flush()
+    if flushed:
+        logger.debug(f"Presence flush: {flushed} heartbeats persisted")
+
+async def reap_silent_advocates():
+    """Take advocates off duty whose last persisted heartbeat is older than the TTL"""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=PRESENCE_TTL_SECONDS)
+    result = await db.advocates.update_many(
+        {"duty_status": True, "$or": [
+            {"last_heartbeat_at": {"$lt": cutoff}},
+            {"last_heartbeat_at": {"$exists": False}}
+        ]},
+        {"$set": {"duty_status": False, "duty_off_reason": "heartbeat_timeout"}}
+    )
+    if result.modified_count:
+        logger.info(f"Presence reaper: {result.modified_count} silent advocates taken off duty")
+
+async def flush_call_events():
+    flushed = await call_events.flush()
+    if flushed:
+        logger.debug(f"Call event flush: {flushed} events written")
+
+WEBHOOK_HANDLERS = {
+    "exotel_status": process_exotel_status,
+    "msg91_otp": process_msg91_otp_event,
+    "twilio_call_status": process_twilio_call_status,
+    "razorpay": process_razorpay_event,
+}
+
+async def webhook_worker():
+    """
+    Claim and apply webhook inbox items until shutdown; idles on the wakeup event or the poll interval
+    
+    On shutdown the item in hand is finished before the worker exits.
+    """
+    while not lifecycle.draining:
+        webhook_inbox_wakeup.clear()
+        try:
+            item = await claim_webhook()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Webhook inbox claim failed: {str(e)}")
+            item = None
+        
+        if item is None:
+            try:
+                await asyncio.wait_for(webhook_inbox_wakeup.wait(), WEBHOOK_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        
+        error = None
+        try:
+            await WEBHOOK_HANDLERS[item["provider"]](item["payload"])
+        except asyncio.CancelledError:
+            raise  # The lease expires and another worker retries it
+        except Exception as e:
+            error = e
+        
+        try:
+            await settle_webhook(item, error)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Webhook {item['dedupe_key']} could not be settled: {str(e)}")
+
+async def compact_wallet_statements():
+    """Fold transactions from closed IST months into wallet statements"""
+    now = datetime.now(IST)
+    cutoff = datetime(now.year, now.month, 1, tzinfo=IST)
+    stale = {"transactions": {"$elemMatch": before_timestamp(cutoff)}}
+    wallets = compacted = 0
+    async for wallet in db.wallets.find(stale, {"_id": 0, "user_id": 1, "balance": 1, "transactions": 1}).batch_size(WALLET_STATEMENT_BATCH_SIZE):
+        try:
+            compacted += await compact_wallet(wallet, cutoff)
+            wallets += 1
+        except Exception as e:
+            logger.error(f"Wallet statement compaction failed for {wallet['user_id']}: {str(e)}")
+    if wallets:
+        logger.info(f"Wallet statements: {compacted} transactions from {wallets} wallets compacted")
+
+# ========== HEALTH PROBES ==========
+
+class LoopLagMonitor:
+    """Event loop responsiveness: how late a periodic sleep wakes up"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0  # Since the last probe read it
+        self.last_tick = None  # monotonic
+    
+    async def run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_tick = time.monotonic()
+            self.lag_ms = max(0.0, (self.last_tick - expected) * 1000)
+            self.max_lag_ms = max(self.max_lag_ms, self.lag_ms)
+    
+    def current(self):
+        """(lag_ms, max_lag_ms); a tick that is overdue counts as lag, so a stalled loop shows up before it wakes"""
+        lag = self.lag_ms
+        if self.last_tick is not None:
+            lag = max(lag, (time.monotonic() - self.last_tick - self.interval) * 1000)
+        max_lag, self.max_lag_ms = max(self.max_lag_ms, lag), lag
+        return round(lag, 1), round(max_lag, 1)
+
+loop_lag = LoopLagMonitor(LOOP_LAG_INTERVAL_SECONDS)
+probes = SingleFlight("probes", PROBE_CACHE_SECONDS)
+
+def probe_response(ok: bool, body: dict):
+    return 200 if ok else 503, json.dumps({"status": "ok" if ok else "unavailable", **body}).encode()
+
+async def check_liveness():
+    lag_ms, max_lag_ms = loop_lag.current()
+    return probe_response(lag_ms <= LIVENESS_MAX_LOOP_LAG_MS, {"loop_lag_ms": lag_ms, "max_loop_lag_ms": max_lag_ms})
+
+async def check_readiness():
+    """Readiness of this instance: Mongo reachable and fast, pool not exhausted, loop responsive, workers running"""
+    checks = {}
+    
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), READY_MONGO_TIMEOUT_SECONDS)
+        checks["mongo"] = {"ok": True}
+    except Exception as e:
+        checks["mongo"] = {"ok": False, "error": str(e) or type(e).__name__}
+    checks["mongo"]["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    
+    saturation = mongo_pool.saturation()
+    checks["mongo_pool"] = {
+        "ok": saturation < READY_MAX_POOL_SATURATION,
+        "saturation": round(saturation, 4),
+        "checkout_failures": mongo_pool.stats["checkout_failures"]
+    }
+    
+    lag_ms, max_lag_ms = loop_lag.current()
+    checks["event_loop"] = {"ok": lag_ms <= READY_MAX_LOOP_LAG_MS, "lag_ms": lag_ms, "max_lag_ms": max_lag_ms}
+    
+    workers = sum(1 for task in _background_tasks if task.get_name().startswith("webhook_worker_"))
+    checks["workers"] = {
+        "ok": workers >= WEBHOOK_WORKERS and len(call_events.buffer) < CALL_EVENT_BATCH_SIZE * 10,
+        "webhook_workers": workers,
+        "call_event_buffer": len(call_events.buffer),
+        "background_tasks": len(_background_tasks)
+    }
+    
+    # Cluster-wide backlog: reported, but the same for every instance so it does not fail the probe
+    if checks["mongo"]["ok"]:
+        try:
+            checks["webhook_backlog"] = {"ok": True, "due": await db.webhook_inbox.count_documents(
+                {"status": "pending", "next_attempt_at": {"$lte": datetime.now(timezone.utc)}},
+                limit=10000, maxTimeMS=int(READY_MONGO_TIMEOUT_SECONDS * 1000)
+            )}
+        except Exception as e:
+            checks["webhook_backlog"] = {"ok": True, "error": str(e)}
+    
+    open_breakers = [name for name, breaker in provider_breakers.items() if breaker.state == "open"]
+    checks["providers"] = {
+        "ok": not (READY_FAIL_ON_OPEN_BREAKER and open_breakers),
+        **{name: breaker.state for name, breaker in provider_breakers.items()}
+    }
+    
+    return probe_response(all(check["ok"] for check in checks.values()), {"checks": checks})
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the event loop is responsive (cached for PROBE_CACHE_SECONDS)"""
+    status_code, body = await probes.do("healthz", check_liveness)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: dependencies are healthy enough to take traffic (cached for PROBE_CACHE_SECONDS)"""
+    status_code, body = await probes.do("readyz", check_readiness)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+def start_background_jobs():
+    spawn_background(loop_lag.run(), name="loop_lag_monitor", cancel_on_shutdown=True)
+    # Per-process buffers are flushed on every replica (and once more on shutdown)
+    spawn_background(run_periodically("presence_flush", PRESENCE_FLUSH_SECONDS, flush_presence), name="presence_flush")
+    spawn_background(run_periodically("call_event_flush", CALL_EVENT_FLUSH_SECONDS, flush_call_events), name="call_event_flush")
+    for i in range(WEBHOOK_WORKERS):
+        spawn_background(webhook_worker(), name=f"webhook_worker_{i}")
+    
+    if not BACKGROUND_JOBS_ENABLED:
+        return
+    
+    spawn_background(
+        run_periodically("presence_reaper", PRESENCE_REAPER_SECONDS, reap_silent_advocates),
+        name="presence_reaper"
+    )
+    spawn_background(
+        run_periodically("availability_sweep", AVAILABILITY_SWEEP_SECONDS, sweep_off_hours_advocates),
+        name="availability_sweep"
+    )
+    spawn_background(
+        run_periodically("wallet_statements", WALLET_STATEMENT_SWEEP_SECONDS, compact_wallet_statements),
+        name="wallet_statements"
+    )
+
+# ========== LIFECYCLE ==========
+
+class Lifecycle:
+    """
+    Graceful shutdown of background work
+    
+    uvicorn runs the shutdown hook only after it has closed the listener and
+    waited for open requests (bounded by --timeout-graceful-shutdown), so
+    request draining is left to it. shutdown() then stops webhook workers
+    and periodic jobs after the item or run in hand, waits for background
+    tasks, and does the final flushes before closing the clients.
+    """
+    
+    def __init__(self, drain_seconds: float):
+        self.drain_seconds = drain_seconds
+        self.stopping = asyncio.Event()
+    
+    @property
+    def draining(self) -> bool:
+        return self.stopping.is_set()
+    
+    async def sleep(self, seconds: float) -> bool:
+        """Sleep, waking early when shutdown starts; returns whether it has"""
+        try:
+            await asyncio.wait_for(self.stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        return self.draining
+    
+    async def wait_for(self, done, deadline: float):
+        while not done() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return done()
+    
+    async def shutdown(self):
+        self.stopping.set()
+        webhook_inbox_wakeup.set()  # Wake idle workers so they see the flag
+        deadline = time.monotonic() + self.drain_seconds
+        started = time.monotonic()
+        
+        for task in list(_cancel_on_shutdown):
+            task.cancel()
+        if not await self.wait_for(lambda: not (_background_tasks - _cancel_on_shutdown), deadline):
+            pending = _background_tasks - _cancel_on_shutdown
+            logger.warning(f"Shutdown: cancelling unfinished background tasks: {', '.join(sorted(t.get_name() for t in pending))}")
+            for task in pending:
+                task.cancel()
+        if _background_tasks:
+            await asyncio.wait(list(_background_tasks), timeout=1)
+        
+        for name, flush in (("presence", presence.flush), ("call event", call_events.flush)):
+            try:
+                await flush()
+            except Exception as e:
+                logger.error(f"Shutdown: {name} flush failed: {str(e)}")
+        
+        await close_provider_clients()
+        client.close()
+        logger.info(f"Shutdown complete in {time.monotonic() - started:.1f}s")
+
+lifecycle = Lifecycle(SHUTDOWN_DRAIN_SECONDS)
 
 # Include router
 app.include_router(api_router)
@@ -1766,31 +4000,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression middleware (reference data keeps its compressed bytes)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_SIZE,
+    offload_size=COMPRESSION_OFFLOAD_SIZE,
+    gzip_level=COMPRESSION_GZIP_LEVEL,
+    brotli_quality=COMPRESSION_BROTLI_QUALITY,
+    cache_prefixes=("/api/utils/",)
+)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    """Drain background work, flush buffered writes, then close Mongo and HTTP clients"""
+    await lifecycle.shutdown()
 
 @app.on_event("startup")
 async def startup_db():
-    """Create indexes on startup"""
-    # Create indexes
-    await db.otps.create_index("expires_at", expireAfterSeconds=0)
-    await db.advocates.create_index("fid", unique=True)
-    await db.advocates.create_index("email", unique=True)
-    await db.users.create_index("email", unique=True)
-    await db.admins.create_index("email", unique=True)
-    
-    # Create default admin if not exists
-    admin_exists = await db.admins.find_one({"email": "admin@formulaw.com"})
-    if not admin_exists:
-        admin = {
-            "id": str(uuid.uuid4()),
-            "email": "admin@formulaw.com",
-            "role": "admin",
-            "name": "Admin",
-            "token": None,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "last_login": None
-        }
-        await db.admins.insert_one(admin)
-        logger.info("Default admin created: admin@formulaw.com")
+    """Report startup timings. Indexes and seed data are managed by migrate.py"""
+    if os.environ.get('AUTO_MIGRATE', '').lower() in ('1', 'true', 'yes'):
+        # Local/dev convenience only - runs in the background so startup is not blocked
+        from migrate import run_migrations
+        spawn_background(run_migrations(db), name="migrations")
+    
+    spawn_background(warm_pool(db, mongo_settings["min_pool_size"]), name="mongo_warmup")
+    start_background_jobs()
+    
+    log_startup_report()
+
+def log_startup_report():
+    """Log module import time, time to startup and any heavy SDKs that were imported eagerly"""
+    startup_ms = (time.perf_counter() - _IMPORT_STARTED) * 1000
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    logger.info(
+        f"Startup report: module import {IMPORT_SECONDS * 1000:.0f} ms, "
+        f"ready after {startup_ms:.0f} ms, heavy modules loaded: {', '.join(loaded) or 'none'}"
+    )
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
@@ -174,6 +174,27 @@ class TestAdvocateRegistration:
         print("SUCCESS: Duplicate registration correctly rejected")
 
 
+# ============ ADVOCATE TESTS (ADVOCATE AUTHENTICATED) ============
+
+class TestAdvocateAPIs:
+    """Test advocate endpoints - requires advocate auth"""
+    
+    def test_heartbeat_unauthorized(self, api_client):
+        """Test POST /api/advocate/heartbeat without auth"""
+        response = api_client.post(f"{BASE_URL}/api/advocate/heartbeat")
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Heartbeat without auth correctly rejected")
+    
+    def test_earnings_report_unauthorized(self, api_client):
+        """Test GET /api/advocate/earnings without auth"""
+        response = api_client.get(f"{BASE_URL}/api/advocate/earnings", params={
+            "start": "2025-01-01",
+            "end": "2025-01-31"
+        })
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Earnings report without auth correctly rejected")
+
+
 # ============ WALLET TESTS (CLIENT AUTHENTICATED) ============
 
 class TestWalletAPIs:
@@ -185,6 +206,12 @@ class TestWalletAPIs:
         assert response.status_code == 401, f"Expected 401, got {response.status_code}"
         print("SUCCESS: Wallet access without auth correctly rejected")
     
+    def test_wallet_statements_unauthorized(self, api_client):
+        """Test GET /api/client/wallet/statements without auth"""
+        response = api_client.get(f"{BASE_URL}/api/client/wallet/statements")
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Wallet statements without auth correctly rejected")
+    
     def test_wallet_topup_unauthorized(self, api_client):
         """Test POST /api/client/wallet/topup without auth"""
         response = api_client.post(f"{BASE_URL}/api/client/wallet/topup", json={
@@ -204,6 +231,21 @@ class TestClientAdvocatesAPIs:
         response = api_client.get(f"{BASE_URL}/api/client/advocates")
         assert response.status_code == 401, f"Expected 401, got {response.status_code}"
         print("SUCCESS: Advocates list without auth correctly rejected")
+    
+    def test_advocates_search_unauthorized(self, api_client):
+        """Test GET /api/client/advocates/search without auth"""
+        response = api_client.get(f"{BASE_URL}/api/client/advocates/search", params={"q": "mumbai"})
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Advocate search without auth correctly rejected")
+    
+    def test_advocates_near_me_unauthorized(self, api_client):
+        """Test GET /api/client/advocates in near-me mode without auth"""
+        response = api_client.get(f"{BASE_URL}/api/client/advocates", params={
+            "near_city": "Navi Mumbai",
+            "radius_km": 30
+        })
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Near-me advocates list without auth correctly rejected")
 
 
 # ============ ADMIN ENDPOINTS (AUTHENTICATED) ============
@@ -222,6 +264,70 @@ class TestAdminAPIs:
         response = api_client.get(f"{BASE_URL}/api/admin/analytics")
         assert response.status_code == 401, f"Expected 401, got {response.status_code}"
         print("SUCCESS: Admin analytics without auth correctly rejected")
+    
+    def test_admin_bulk_verify_unauthorized(self, api_client):
+        """Test POST /api/admin/advocates/bulk-verify without auth"""
+        response = api_client.post(f"{BASE_URL}/api/admin/advocates/bulk-verify", json={
+            "items": [{"advocate_id": "missing", "status": "approved"}]
+        })
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Bulk verify without auth correctly rejected")
+    
+    def test_admin_export_unauthorized(self, api_client):
+        """Test GET /api/admin/export/calls without auth"""
+        response = api_client.get(f"{BASE_URL}/api/admin/export/calls", params={"format": "csv"})
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Export without auth correctly rejected")
+    
+    def test_admin_import_unauthorized(self, api_client):
+        """Test POST /api/admin/advocates/import without auth"""
+        response = api_client.post(
+            f"{BASE_URL}/api/admin/advocates/import",
+            params={"format": "csv"},
+            data="email,first_name\n",
+            headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Roster import without auth correctly rejected")
+    
+    def test_admin_call_events_unauthorized(self, api_client):
+        """Test GET /api/admin/calls/{call_id}/events without auth"""
+        response = api_client.get(f"{BASE_URL}/api/admin/calls/test-call/events")
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Call event log without auth correctly rejected")
+    
+    def test_admin_call_replay_unauthorized(self, api_client):
+        """Test POST /api/admin/calls/{call_id}/replay without auth"""
+        response = api_client.post(f"{BASE_URL}/api/admin/calls/test-call/replay")
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Call replay without auth correctly rejected")
+    
+    def test_admin_dead_letter_webhooks_unauthorized(self, api_client):
+        """Test GET /api/admin/webhooks/dead-letter without auth"""
+        response = api_client.get(f"{BASE_URL}/api/admin/webhooks/dead-letter")
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Dead-letter webhooks without auth correctly rejected")
+    
+    def test_admin_analytics_timeseries_unauthorized(self, api_client):
+        """Test GET /api/admin/analytics/timeseries without auth"""
+        response = api_client.get(f"{BASE_URL}/api/admin/analytics/timeseries", params={
+            "start": "2025-01-01",
+            "end": "2025-01-31"
+        })
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Analytics time series without auth correctly rejected")
+    
+    def test_admin_metrics_unauthorized(self, api_client):
+        """Test GET /api/admin/metrics without auth"""
+        response = api_client.get(f"{BASE_URL}/api/admin/metrics")
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: Metrics without auth correctly rejected")
+    
+    def test_admin_user_search_unauthorized(self, api_client):
+        """Test GET /api/admin/users/search without auth"""
+        response = api_client.get(f"{BASE_URL}/api/admin/users/search", params={"email_prefix": "a"})
+        assert response.status_code == 401, f"Expected 401, got {response.status_code}"
+        print("SUCCESS: User search without auth correctly rejected")
 
 
 # ============ WEBHOOK ENDPOINTS ============
@@ -4,13 +4,19 @@ import { useAuth } from '../../context/AuthContext';
 import { Button } from '../../components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '../../components/ui/card';
 import { Badge } from '../../components/ui/badge';
+import { Input } from '../../components/ui/input';
 import { toast } from 'sonner';
-import { ArrowLeft, Users, Mail } from 'lucide-react';
+import { ArrowLeft, Users, Mail, Search } from 'lucide-react';
 import { formatDate } from '../../lib/utils';
 
 const AdminUsers = () => {
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [filters, setFilters] = useState({ email_prefix: '', city: '' });
+  // Filters of the last submitted search; "Load more" pages with these, not the inputs
+  const [searchedFilters, setSearchedFilters] = useState({ email_prefix: '', city: '' });
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totalEstimate, setTotalEstimate] = useState(null);
   const { axios, user } = useAuth();
   const navigate = useNavigate();
 
@@ -19,13 +25,21 @@ const AdminUsers = () => {
       navigate('/admin');
       return;
     }
-    fetchUsers();
+    fetchUsers(searchedFilters);
   }, []);
 
-  const fetchUsers = async () => {
+  const fetchUsers = async (searchFilters, cursor = null) => {
+    setLoading(true);
     try {
-      const response = await axios.get('/admin/users');
-      setUsers(response.data);
+      const params = { limit: 50 };
+      if (searchFilters.email_prefix) params.email_prefix = searchFilters.email_prefix;
+      if (searchFilters.city) params.city = searchFilters.city;
+      if (cursor) params.cursor = cursor;
+
+      const response = await axios.get('/admin/users/search', { params });
+      setUsers(cursor ? [...users, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+      setTotalEstimate(response.headers['x-total-estimate'] || null);
     } catch (error) {
       toast.error('Failed to fetch users');
     } finally {
@@ -50,15 +64,41 @@ const AdminUsers = () => {
           <p className="text-gray-600">View and manage all client users</p>
         </div>
 
+        <form
+          className="flex gap-3 mb-6"
+          onSubmit={(e) => {
+            e.preventDefault();
+            setSearchedFilters(filters);
+            fetchUsers(filters);
+          }}
+        >
+          <Input
+            placeholder="Email starts with..."
+            value={filters.email_prefix}
+            onChange={(e) => setFilters({ ...filters, email_prefix: e.target.value })}
+            data-testid="user-search-email"
+          />
+          <Input
+            placeholder="City"
+            value={filters.city}
+            onChange={(e) => setFilters({ ...filters, city: e.target.value })}
+            data-testid="user-search-city"
+          />
+          <Button type="submit" data-testid="user-search-submit">
+            <Search className="w-4 h-4 mr-2" />
+            Search
+          </Button>
+        </form>
+
         <Card>
           <CardHeader>
             <CardTitle className="flex items-center gap-2">
               <Users className="w-5 h-5" />
-              All Users ({users.length})
+              Users ({users.length}{totalEstimate ? ` of ~${totalEstimate}` : ''})
             </CardTitle>
           </CardHeader>
           <CardContent>
-            {loading ? (
+            {loading && users.length === 0 ? (
               <p className="text-center py-8">Loading...</p>
             ) : users.length === 0 ? (
               <p className="text-center text-gray-500 py-8">No users yet</p>
@@ -84,6 +124,17 @@ const AdminUsers = () => {
                     </div>
                   </div>
                 ))}
+                {nextCursor && (
+                  <Button
+                    variant="outline"
+                    className="w-full"
+                    disabled={loading}
+                    onClick={() => fetchUsers(searchedFilters, nextCursor)}
+                    data-testid="user-search-more"
+                  >
+                    {loading ? 'Loading...' : 'Load more'}
+                  </Button>
+                )}
               </div>
             )}
           </CardContent>
@@ -16,6 +16,8 @@ import {
   DropdownMenuTrigger,
 } from "../../components/ui/dropdown-menu";
 
+const HEARTBEAT_INTERVAL_MS = 30000;
+
 const AdvocateDashboard = () => {
   const [dashboard, setDashboard] = useState(null);
   const [profile, setProfile] = useState(null);
@@ -35,6 +37,25 @@ const AdvocateDashboard = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [authLoading, user]);
 
+  // Presence heartbeat while on duty - the backend takes silent advocates offline
+  useEffect(() => {
+    if (!dashboard?.duty_status) return;
+    const sendHeartbeat = async () => {
+      try {
+        const response = await axios.post('/advocate/heartbeat');
+        if (!response.data.duty_status) {
+          fetchDashboard();
+        }
+      } catch (error) {
+        console.error('Heartbeat failed:', error);
+      }
+    };
+    sendHeartbeat();
+    const interval = setInterval(sendHeartbeat, HEARTBEAT_INTERVAL_MS);
+    return () => clearInterval(interval);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [dashboard?.duty_status]);
+
   const fetchDashboard = async () => {
     try {
       const response = await axios.get('/advocate/dashboard');
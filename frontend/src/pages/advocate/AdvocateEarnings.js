@@ -10,6 +10,7 @@ import { formatCurrency } from '../../lib/utils';
 const AdvocateEarnings = () => {
   const [dashboard, setDashboard] = useState(null);
   const [calls, setCalls] = useState([]);
+  const [monthReport, setMonthReport] = useState(null);
   const [loading, setLoading] = useState(true);
   const { axios, user } = useAuth();
   const navigate = useNavigate();
@@ -21,6 +22,7 @@ const AdvocateEarnings = () => {
     }
     fetchDashboard();
     fetchCalls();
+    fetchMonthReport();
   }, []);
 
   const fetchDashboard = async () => {
@@ -44,10 +46,21 @@ const AdvocateEarnings = () => {
     }
   };
 
-  const thisMonth = new Date().getMonth();
-  const thisMonthEarnings = calls
-    .filter(call => new Date(call.created_at).getMonth() === thisMonth)
-    .reduce((sum, call) => sum + (call.total_cost || 0), 0);
+  const fetchMonthReport = async () => {
+    const today = new Date();
+    const pad = (n) => String(n).padStart(2, '0');
+    const todayStr = `${today.getFullYear()}-${pad(today.getMonth() + 1)}-${pad(today.getDate())}`;
+    try {
+      const response = await axios.get('/advocate/earnings', {
+        params: { start: todayStr, end: todayStr, granularity: 'month' }
+      });
+      setMonthReport(response.data.totals);
+    } catch (error) {
+      console.error('Failed to fetch earnings report:', error);
+    }
+  };
+
+  const thisMonthEarnings = monthReport?.gross || 0;
 
   const avgCallDuration = calls.length > 0
     ? calls.reduce((sum, call) => sum + (call.duration_minutes || 0), 0) / calls.length
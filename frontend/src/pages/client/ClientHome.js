@@ -78,7 +78,7 @@ const ClientHome = () => {
   const fetchAdvocates = async () => {
     setLoading(true);
     try {
-      const params = {};
+      const params = { view: 'card' };
       if (filters.law_type) params.law_type = filters.law_type;
       if (filters.city) params.city = filters.city;
       if (filters.language) params.language = filters.language;